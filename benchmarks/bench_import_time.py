@@ -0,0 +1,90 @@
+"""
+Cold-start import time of the sciopy entry points.
+
+Every statement is run in a fresh interpreter. The script fails if the acquisition
+path loads one of the analysis dependencies or exceeds the time budget.
+
+    python benchmarks/bench_import_time.py --repeat 7 --budget-ms 500
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# Statement and the modules it must not load
+STATEMENTS = {
+    "import sciopy": ("numpy", "matplotlib", "pyeit", "pandas", "tqdm"),
+    "from sciopy import connect_COM_port_usb_hs": (
+        "matplotlib",
+        "pyeit",
+        "pandas",
+        "tqdm",
+    ),
+    "from sciopy import sciospec_measurement": (
+        "matplotlib",
+        "pyeit",
+        "pandas",
+        "tqdm",
+    ),
+    "from sciopy import plot_completeness": (),
+}
+ACQUISITION = "from sciopy import connect_COM_port_usb_hs"
+
+PROBE = """
+import sys, time, json
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"ms": 1e3 * elapsed, "modules": sorted(sys.modules)}}))
+"""
+
+
+def measure(statement: str) -> dict:
+    """
+    Import time and loaded modules of a statement in a fresh interpreter.
+    """
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE.format(statement=statement)],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=None,
+        help="maximum median import time of the acquisition path",
+    )
+    args = parser.parse_args()
+
+    failed = False
+    for statement, forbidden in STATEMENTS.items():
+        runs = [measure(statement) for _ in range(args.repeat)]
+        median = statistics.median(run["ms"] for run in runs)
+        loaded = [
+            name
+            for name in forbidden
+            if any(
+                mod == name or mod.startswith(f"{name}.") for mod in runs[0]["modules"]
+            )
+        ]
+        print(f"{median:8.1f} ms  {statement}")
+        if loaded:
+            print(f"{'':13}unexpectedly loaded: {', '.join(loaded)}")
+            failed = True
+        if statement == ACQUISITION and args.budget_ms and median > args.budget_ms:
+            print(f"{'':13}exceeds the budget of {args.budget_ms} ms")
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
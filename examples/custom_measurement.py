@@ -1,15 +1,14 @@
-import numpy as np
-
 from sciopy import (
     sciospec_measurement,
     connect_COM_port_usb_hs,
     set_measurement_config_usb_hs,
     SystemMessageCallback_usb_hs,
+    DatasetWriter,
 )
 
 from sciopy.sciopy_dataclasses import ScioSpecMeasurementSetup
 
-s_path = ""
+s_path = "measurement/"
 
 # connect device
 Sciospec = connect_COM_port_usb_hs()
@@ -37,13 +36,10 @@ set_measurement_config_usb_hs(Sciospec, ssms)
 SystemMessageCallback_usb_hs(Sciospec, prnt_msg=True)
 
 # measurement
-sciospec_data = sciospec_measurement(Sciospec, ssms)
+sciospec_data = sciospec_measurement(Sciospec, ssms, frame_batch=True)
 
-file_idx = 0
-for bursts in sciospec_data:
-    np.savez(
-        s_path + "sample_{0:06d}.npz".format(file_idx),
-        config=ssms,
-        data=bursts,
-    )
-    file_idx += 1
+# append every burst to the dataset directory, it is read by the preparation and
+# export functions like a directory of sample files
+with DatasetWriter(s_path) as dataset:
+    for burst in range(len(sciospec_data)):
+        dataset.append_sample(sciospec_data, ssms, burst=burst)
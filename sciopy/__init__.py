@@ -1,200 +1,222 @@
-from .doteit import (
-    doteit_in_SingleEitFrame,
-    list_eit_files,
-    list_all_files,
-    single_eit_in_pickle,
-    load_pickle_to_dict,
-    convert_fulldir_doteit_to_pickle,
-    convert_fulldir_doteit_to_npz,
-)
-
-
-from .com_handling import (
-    available_serial_ports,
-    connect_COM_port,
-    serial_write,
-    disconnect_COM_port,
-)
-
-from .usb_hs_handling import (
-    connect_COM_port_usb_hs,
-    set_measurement_config_usb_hs,
-    SystemMessageCallback_usb_hs,
-    StartStopMeasurement_usb_hs,
-    SoftwareReset_usb_hs,
-)
-
-from .print_command_info import (
-    print_syntax,
-    print_general_system_messages,
-    print_acknowledge_messages,
-    print_command_list,
-)
+import importlib
 
-from .prepare_data import (
-    create_prep_directory,
-    extract_potentials_from_sample_n_el_16,
-    comp_tank_relative_r_phi,
-    check_n_el_condition,
-    extract_electrodepotentials,
-    norm_data,
-    prepare_all_samples_for_16_el,
-    prepare_all_samples_for_16_el_single,
-    compute_v,
-)
+# Public API and the submodules that define it. The submodules are imported on the
+# first attribute access (PEP 562), so e.g. an acquisition script that only uses
+# connect_COM_port_usb_hs does not load matplotlib, pyeit or pandas.
+_submodules = {
+    "doteit": (
+        "doteit_in_SingleEitFrame",
+        "doteit_to_arrays",
+        "list_eit_files",
+        "list_all_files",
+        "single_eit_in_pickle",
+        "single_eit_in_npz",
+        "load_manifest",
+        "load_pickle_to_dict",
+        "convert_fulldir_doteit_to_pickle",
+        "convert_fulldir_doteit_to_npz",
+    ),
+    "com_handling": (
+        "available_serial_ports",
+        "connect_COM_port",
+        "serial_write",
+        "disconnect_COM_port",
+    ),
+    "usb_hs_handling": (
+        "connect_COM_port_usb_hs",
+        "set_measurement_config_usb_hs",
+        "SystemMessageCallback_usb_hs",
+        "StartStopMeasurement_usb_hs",
+        "SoftwareReset_usb_hs",
+        "stream_measurement",
+    ),
+    "usb_hs_reader": (
+        "ByteRingBuffer",
+        "UsbHsReader",
+    ),
+    "frame_decoding": (
+        "decode_frames",
+        "frame_channels",
+        "decode_bursts",
+        "frames_to_frame_batch",
+        "BurstAssembler",
+        "single_frames_to_frame_batch",
+        "decode_frame_batch",
+    ),
+    "command_layer": (
+        "SciospecError",
+        "NotAcknowledgeError",
+        "CommandTimeoutError",
+        "write_bytes",
+        "read_bytes",
+        "send_command",
+        "send_commands",
+    ),
+    "async_client": ("AsyncSciospec",),
+    "dataset": (
+        "DatasetWriter",
+        "DatasetReader",
+        "is_dataset",
+        "open_dataset",
+        "list_samples",
+        "load_directory_sample",
+    ),
+    "sample_format": (
+        "save_sample",
+        "load_sample",
+        "is_legacy_sample",
+        "sample_config",
+        "migrate_sample",
+        "migrate_sample_directory",
+    ),
+    "sample_index": (
+        "index_path",
+        "sample_metadata",
+        "update_index",
+        "load_index",
+    ),
+    "print_command_info": (
+        "print_syntax",
+        "print_general_system_messages",
+        "print_acknowledge_messages",
+        "print_command_list",
+    ),
+    "setup_m": (
+        "SystemMessageCallback",
+        "SaveSettings",
+        "SoftwareReset",
+        "ResetMeasurementSetup",
+        "SetMeasurementSetup",
+        "GetMeasurementSetup",
+        "parse_device_setup",
+        "read_device_setup",
+        "invalidate_device_setup",
+        "SetBurstCount",
+        "StartStopMeasurement",
+        "single_hex_to_int",
+        "del_hex_in_list",
+        "bytesarray_to_float",
+        "bytesarray_to_int",
+        "bytesarray_to_byteslist",
+        "reduce_burst_to_less_x",
+        "reduce_burst_to_available_parts",
+        "parse_single_frame",
+        "reshape_full_message_in_bursts",
+        "split_bursts_in_frames",
+        "GetTemperature",
+        "SetBatteryControll",
+        "GetBatteryControll",
+        "SetLEDControl",
+        "GetLEDControl",
+        "SetLED_Mode",
+        "DisableLED_AutoMode",
+        "EnableLED_AutoMode",
+        "PowerPlugDetect",
+        "GetDeviceInfo",
+        "GetFirmwareIDs",
+    ),
+    "configurations": (
+        "set_measurement_config",
+        "injection_pairs",
+        "measurement_config_sections",
+        "measurement_config_commands",
+        "config_update_commands",
+        "prepare_config_upload",
+        "finish_config_upload",
+        "build_measurement_config",
+        "verify_acknowledgements",
+        "conf_n_el_16_adjacent",
+        "conf_n_el_32_adjacent",
+        "conf_n_el_16_opposite",
+        "conf_n_el_32_opposite",
+    ),
+    "prepare_data": (
+        "create_prep_directory",
+        "extract_potentials",
+        "extract_potentials_from_sample_n_el_16",
+        "comp_tank_relative_r_phi",
+        "check_n_el_condition",
+        "sample_excitation_stgs",
+        "extract_electrodepotentials",
+        "norm_data",
+        "prepare_sample_chunk",
+        "prepare_samples",
+        "prepare_all_samples_for_16_el",
+        "prepare_all_samples_for_16_el_single",
+        "load_prepared_arrays",
+        "compute_v",
+    ),
+    "visualization": (
+        "plot_potential_matrix",
+        "plot_el_sign",
+        "plot_completeness",
+        "plot_temperatur_curve",
+    ),
+    "npztocsv": (
+        "clear_s_dict",
+        "sample_rows",
+        "single_measurement_to_csv_n_el_16",
+        "export_measurement_directory",
+        "export_measurement_directory_r_split",
+        "convert_measurement_directory_n_el_16",
+        "convert_measurement_directory_n_el_16_r_split",
+    ),
+    "meshing": (
+        "create_empty_2d_mesh",
+        "add_circle_anomaly",
+        "MeshTemplate",
+        "mesh_template",
+        "plot_mesh",
+        "mesh_sample",
+    ),
+    "sciospec_hs": ("sciospec_measurement",),
+}
 
-from .visualization import (
-    plot_el_sign,
-    plot_potential_matrix,
-    plot_completeness,
-    plot_temperatur_curve,
+# Every submodule is also an attribute of the package, e.g. `sciopy.setup_m`, as
+# with the eager imports of earlier versions.
+_all_submodules = (
+    "async_client",
+    "com_handling",
+    "command_layer",
+    "configurations",
+    "dataset",
+    "doteit",
+    "frame_decoding",
+    "meshing",
+    "npztocsv",
+    "prepare_data",
+    "print_command_info",
+    "protocol",
+    "sample_format",
+    "sample_index",
+    "sciopy_dataclasses",
+    "sciospec_hs",
+    "setup_m",
+    "usb_hs_handling",
+    "usb_hs_reader",
+    "visualization",
 )
 
-from .setup_m import (
-    SystemMessageCallback,
-    SaveSettings,
-    SoftwareReset,
-    ResetMeasurementSetup,
-    SetMeasurementSetup,
-    GetMeasurementSetup,
-    SetBurstCount,
-    StartStopMeasurement,
-    single_hex_to_int,
-    del_hex_in_list,
-    bytesarray_to_float,
-    bytesarray_to_int,
-    bytesarray_to_byteslist,
-    reduce_burst_to_less_x,
-    reduce_burst_to_available_parts,
-    parse_single_frame,
-    reshape_full_message_in_bursts,
-    split_bursts_in_frames,
-    GetTemperature,
-    SetBatteryControll,
-    GetBatteryControll,
-    SetLEDControl,
-    GetLEDControl,
-    SetLED_Mode,
-    DisableLED_AutoMode,
-    EnableLED_AutoMode,
-    PowerPlugDetect,
-    GetDeviceInfo,
-    GetFirmwareIDs,
-)
+_name_to_submodule = {
+    name: submodule for submodule, names in _submodules.items() for name in names
+}
 
-from .configurations import (
-    set_measurement_config,
-    conf_n_el_16_adjacent,
-    conf_n_el_32_adjacent,
-    conf_n_el_16_opposite,
-    conf_n_el_32_opposite,
-)
+__all__ = [name for names in _submodules.values() for name in names]
+__all__ += _all_submodules
 
-from .npztocsv import (
-    clear_s_dict,
-    single_measurement_to_csv_n_el_16,
-    convert_measurement_directory_n_el_16,
-    convert_measurement_directory_n_el_16_r_split,
-)
-
-from .meshing import (
-    create_empty_2d_mesh,
-    add_circle_anomaly,
-    plot_mesh,
-    mesh_sample,
-)
 
-from .sciospec_hs import sciospec_measurement
+def __getattr__(name: str):
+    submodule = _name_to_submodule.get(name)
+    if submodule is not None:
+        value = getattr(importlib.import_module(f".{submodule}", __name__), name)
+    elif name in _all_submodules:
+        value = importlib.import_module(f".{name}", __name__)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    # Later accesses skip __getattr__.
+    globals()[name] = value
+    return value
 
-# TBD from .configurations import configuration_01
 
-__all__ = [
-    # .doteit
-    "doteit_in_SingleEitFrame",
-    "list_eit_files",
-    "list_all_files",
-    "single_eit_in_pickle",
-    "load_pickle_to_dict",
-    "convert_fulldir_doteit_to_pickle",
-    "convert_fulldir_doteit_to_npz",
-    # .com_handling
-    "available_serial_ports",
-    "connect_COM_port",
-    "serial_write",
-    "disconnect_COM_port",
-    # .usb_hs_handling
-    "connect_COM_port_usb_hs",
-    "set_measurement_config_usb_hs",
-    "SystemMessageCallback_usb_hs",
-    "StartStopMeasurement_usb_hs",
-    "SoftwareReset_usb_hs",
-    # .print_command_info
-    "print_syntax",
-    "print_general_system_messages",
-    "print_acknowledge_messages",
-    "print_command_list",
-    # .setup_m
-    "SystemMessageCallback",
-    "SaveSettings",
-    "SoftwareReset",
-    "ResetMeasurementSetup",
-    "SetMeasurementSetup",
-    "GetMeasurementSetup",
-    "SetBurstCount",
-    "StartStopMeasurement",
-    "single_hex_to_int",
-    "del_hex_in_list",
-    "bytesarray_to_float",
-    "bytesarray_to_int",
-    "bytesarray_to_byteslist",
-    "reduce_burst_to_less_x",
-    "reduce_burst_to_available_parts",
-    "parse_single_frame",
-    "reshape_full_message_in_bursts",
-    "split_bursts_in_frames",
-    "GetTemperature",
-    "SetBatteryControll",
-    "GetBatteryControll",
-    "SetLEDControl",
-    "GetLEDControl",
-    "SetLED_Mode",
-    "DisableLED_AutoMode",
-    "EnableLED_AutoMode",
-    "PowerPlugDetect",
-    "GetDeviceInfo",
-    "GetFirmwareIDs",
-    # .configurations
-    "set_measurement_config",
-    "conf_n_el_16_adjacent",
-    "conf_n_el_32_adjacent",
-    "conf_n_el_16_opposite",
-    "conf_n_el_32_opposite",
-    # "configure_configuration",
-    # .prepare_data
-    "create_prep_directory",
-    "extract_potentials_from_sample_n_el_16",
-    "comp_tank_relative_r_phi",
-    "check_n_el_condition",
-    "extract_electrodepotentials",
-    "norm_data",
-    "prepare_all_samples_for_16_el",
-    "prepare_all_samples_for_16_el_single",
-    "compute_v",
-    # .visualization
-    "plot_potential_matrix",
-    "plot_el_sign",
-    "plot_completeness",
-    "plot_temperatur_curve",
-    # .npztocsv
-    "clear_s_dict",
-    "single_measurement_to_csv_n_el_16",
-    "convert_measurement_directory_n_el_16",
-    "convert_measurement_directory_n_el_16_r_split",
-    # .meshing
-    "create_empty_2d_mesh",
-    "add_circle_anomaly",
-    "plot_mesh",
-    "mesh_sample",
-    # .sciospec_hs
-    "sciospec_measurement",
-]
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,268 @@
+import asyncio
+import time
+from typing import AsyncIterator, List, Tuple, Union
+
+from .com_handling import connect_COM_port
+from .usb_hs_handling import connect_COM_port_usb_hs
+from .frame_decoding import BurstAssembler, FrameAssembler
+from .command_layer import (
+    CommandTimeoutError,
+    ResponseCollector,
+    read_bytes,
+    write_bytes,
+)
+from .setup_m import DEVICE_SETUP_QUERIES, parse_device_setup
+from . import protocol
+from .sciopy_dataclasses import DeviceSetup, FrameBatch, ScioSpecMeasurementSetup
+
+
+class AsyncSciospec:
+    """
+    asyncio client for a Sciospec device connected via pyserial or the USB-HS (pyftdi) port.
+    The blocking device I/O runs in the default executor, so several devices or other
+    coroutines (e.g. a motion stage) can be driven from one event loop.
+
+    Parameters
+    ----------
+    device :
+        serial connection from `connect_COM_port()` or `connect_COM_port_usb_hs()`
+    """
+
+    def __init__(self, device) -> None:
+        self.device = device
+        self._lock = asyncio.Lock()
+        self._assembler = FrameAssembler()
+        self._setup = None
+
+    @classmethod
+    async def connect_serial(
+        cls, port: str = "COM3", baudrate: int = 9600, timeout: float = 0.01
+    ) -> "AsyncSciospec":
+        """
+        Connect a Sciospec device via pyserial.
+
+        Parameters
+        ----------
+        port : str, optional
+            name of the com port, by default "COM3"
+        baudrate : int, optional
+            communication rate, by default 9600
+        timeout : float, optional
+            read timeout in seconds of a single executor read, by default 0.01
+
+        Returns
+        -------
+        AsyncSciospec
+            connected client
+        """
+        loop = asyncio.get_running_loop()
+        device = await loop.run_in_executor(
+            None, connect_COM_port, port, baudrate, timeout
+        )
+        return cls(device)
+
+    @classmethod
+    async def connect_usb_hs(
+        cls, url: str = "ftdi://ftdi:232h/1", baudrate: int = 9000
+    ) -> "AsyncSciospec":
+        """
+        Connect a Sciospec device via the USB-HS port.
+
+        Parameters
+        ----------
+        url : str, optional
+            ftdi driver, by default "ftdi://ftdi:232h/1"
+        baudrate : int, optional
+            baud rate, by default 9000
+
+        Returns
+        -------
+        AsyncSciospec
+            connected client
+        """
+        loop = asyncio.get_running_loop()
+        device = await loop.run_in_executor(
+            None, connect_COM_port_usb_hs, url, baudrate
+        )
+        return cls(device)
+
+    async def write(self, data: Union[bytes, bytearray]) -> None:
+        """
+        Write raw bytes to the device.
+
+        Parameters
+        ----------
+        data : Union[bytes, bytearray]
+            command frame(s)
+        """
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, write_bytes, self.device, bytes(data))
+
+    async def read(self, size: int = 1024, attempt: int = 1) -> bytes:
+        """
+        Read up to `size` bytes from the device.
+
+        Parameters
+        ----------
+        size : int, optional
+            maximum number of bytes, by default 1024
+        attempt : int, optional
+            USB-HS read attempts, by default 1
+
+        Returns
+        -------
+        bytes
+            received bytes, empty if nothing arrived
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, read_bytes, self.device, size, attempt)
+
+    async def command(
+        self, frame: Union[bytes, bytearray], timeout: float = 1.0
+    ) -> List[Tuple[int, bytes]]:
+        """
+        Send a command frame and await the returning frames up to its acknowledge.
+
+        Parameters
+        ----------
+        frame : Union[bytes, bytearray]
+            command frame, e.g. bytes([0xD1, 0x00, 0xD1])
+        timeout : float, optional
+            maximum waiting time in seconds, by default 1.0
+
+        Returns
+        -------
+        List[Tuple[int, bytes]]
+            returned frames as (command tag, data bytes) without system messages
+
+        Raises
+        ------
+        NotAcknowledgeError
+            if the command was not acknowledged
+        CommandTimeoutError
+            if no acknowledge arrived within the timeout
+        """
+        responses = await self.commands([frame], timeout)
+        return responses[0]
+
+    async def commands(
+        self, frames: List[Union[bytes, bytearray]], timeout: float = 1.0
+    ) -> List[List[Tuple[int, bytes]]]:
+        """
+        Send several command frames with a single write and await all acknowledges.
+
+        Parameters
+        ----------
+        frames : List[Union[bytes, bytearray]]
+            command frames
+        timeout : float, optional
+            maximum waiting time in seconds for all acknowledges, by default 1.0
+
+        Returns
+        -------
+        List[List[Tuple[int, bytes]]]
+            returned frames of every command as (command tag, data bytes)
+
+        Raises
+        ------
+        NotAcknowledgeError
+            if a command was not acknowledged
+        CommandTimeoutError
+            if not all acknowledges arrived within the timeout
+        """
+        frames = [bytes(frame) for frame in frames]
+        async with self._lock:
+            await self.write(b"".join(frames))
+            if any(frame[0] in (0xA1, 0xB0) for frame in frames):
+                # Software reset and setup commands change the device setup.
+                self._setup = None
+            collector = ResponseCollector(frames, self._assembler)
+            deadline = time.monotonic() + timeout
+            while time.monotonic() < deadline:
+                if collector.feed(await self.read()):
+                    return collector.responses
+            raise collector.timeout_error(timeout)
+
+    async def device_setup(self, use_cache: bool = True) -> DeviceSetup:
+        """
+        Read back the measurement setup, cached until a setup command is sent.
+
+        Parameters
+        ----------
+        use_cache : bool, optional
+            return the cached setup if available, by default True
+
+        Returns
+        -------
+        DeviceSetup
+            current measurement setup of the device
+        """
+        if use_cache and self._setup is not None:
+            return self._setup
+        self._setup = parse_device_setup(await self.commands(DEVICE_SETUP_QUERIES))
+        return self._setup
+
+    async def measurement(
+        self,
+        ssms: ScioSpecMeasurementSetup,
+        size: int = 1024,
+        attempt: int = 150,
+        timeout: Union[None, float] = None,
+    ) -> AsyncIterator[FrameBatch]:
+        """
+        Start a measurement and asynchronously iterate over the received bursts.
+        The device is locked for other commands until the iteration is finished.
+
+        Parameters
+        ----------
+        ssms : ScioSpecMeasurementSetup
+            dataclass with the measurement setup settings
+        size : int, optional
+            bytes per read, by default 1024
+        attempt : int, optional
+            USB-HS read attempts of a single read, by default 150
+        timeout : Union[None, float], optional
+            maximum time in seconds without received data, by default two burst
+            periods of `ssms.framerate`, at least 1 s
+
+        Yields
+        ------
+        AsyncIterator[FrameBatch]
+            single burst frame batch
+
+        Raises
+        ------
+        CommandTimeoutError
+            if no data arrived within the timeout before `burst_count` bursts
+        """
+        if timeout is None:
+            timeout = max(1.0, 2.0 / ssms.framerate)
+        async with self._lock:
+            bursts = BurstAssembler(ssms)
+            await self.write(protocol.START_MEASUREMENT)
+            try:
+                # A single empty read only means a gap between frames, the
+                # pyserial read returns after the port timeout.
+                idle_deadline = time.monotonic() + timeout
+                while not bursts.complete:
+                    buffer = await self.read(size, attempt)
+                    if buffer:
+                        idle_deadline = time.monotonic() + timeout
+                        for batch in bursts.feed(buffer):
+                            yield batch
+                    elif time.monotonic() > idle_deadline:
+                        raise CommandTimeoutError(
+                            f"Received {bursts.bursts} of {bursts.burst_count} bursts, no data within {timeout}s"
+                        )
+            finally:
+                await self.write(protocol.STOP_MEASUREMENT)
+                while await self.read(size, attempt):
+                    pass
+                self._assembler = FrameAssembler()
+
+    async def close(self) -> None:
+        """
+        Close the device connection.
+        """
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.device.close)
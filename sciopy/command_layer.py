@@ -0,0 +1,289 @@
+import time
+from typing import List, Tuple, Union
+
+from .frame_decoding import FrameAssembler
+
+SYSTEM_MESSAGES = {
+    0x01: "Frame-Not-Acknowledge: Incorrect syntax",
+    0x02: "Timeout: Communication-timeout (less data than expected)",
+    0x04: "Wake-Up Message: System boot ready",
+    0x11: "TCP-Socket: Valid TCP client-socket connection",
+    0x81: "Not-Acknowledge: Command has not been executed",
+    0x82: "Not-Acknowledge: Command could not be recognized",
+    0x83: "Command-Acknowledge: Command has been executed successfully",
+    0x84: "System-Ready Message: System is operational and ready to receive data",
+    0x92: "Data holdup: Measurement data could not be sent via the master interface",
+}
+SYSTEM_MESSAGE_TAG = 0x18
+ACK = 0x83
+NOT_ACKNOWLEDGE = (0x01, 0x81, 0x82)
+
+
+class SciospecError(Exception):
+    """
+    Base class of the errors raised by the command layer.
+    """
+
+
+class NotAcknowledgeError(SciospecError):
+    """
+    The device answered a command with a (frame-)not-acknowledge message.
+
+    Parameters
+    ----------
+    code : int
+        system message code 0x01, 0x81 or 0x82
+    frame : bytes
+        sent command frame
+    """
+
+    def __init__(self, code: int, frame: bytes) -> None:
+        self.code = code
+        self.frame = frame
+        super().__init__(f"{SYSTEM_MESSAGES[code]} (command: {frame.hex(' ')})")
+
+
+class CommandTimeoutError(SciospecError):
+    """
+    The device did not acknowledge a command in time or reported a communication timeout.
+    """
+
+
+def write_bytes(serial, data: Union[bytes, bytearray]) -> None:
+    """
+    Write to a pyserial or USB-HS (pyftdi) connection.
+
+    Parameters
+    ----------
+    serial :
+        serial connection
+    data : Union[bytes, bytearray]
+        bytes to write
+    """
+    if hasattr(serial, "write_data"):
+        serial.write_data(data)
+    else:
+        serial.write(data)
+
+
+def read_bytes(serial, size: int = 1024, attempt: int = 1) -> bytes:
+    """
+    Read the bytes that are available at a pyserial or USB-HS (pyftdi) connection.
+    A pyserial connection blocks at most for its timeout until the first byte arrives.
+
+    Parameters
+    ----------
+    serial :
+        serial connection
+    size : int, optional
+        maximum number of bytes, by default 1024
+    attempt : int, optional
+        USB-HS read attempts, by default 1
+
+    Returns
+    -------
+    bytes
+        received bytes, empty if nothing arrived
+    """
+    if hasattr(serial, "read_data_bytes"):
+        return bytes(serial.read_data_bytes(size=size, attempt=attempt))
+    return bytes(serial.read(min(size, max(1, serial.in_waiting))))
+
+
+def check_system_message(code: int, frame: bytes) -> bool:
+    """
+    Decide whether a system message completes the response of a command.
+
+    Parameters
+    ----------
+    code : int
+        system message code
+    frame : bytes
+        sent command frame
+
+    Returns
+    -------
+    bool
+        true for a command-acknowledge, false for informational messages
+
+    Raises
+    ------
+    NotAcknowledgeError
+        on a (frame-)not-acknowledge message
+    CommandTimeoutError
+        on a communication-timeout message
+    """
+    if code == ACK:
+        return True
+    if code in NOT_ACKNOWLEDGE:
+        raise NotAcknowledgeError(code, frame)
+    if code == 0x02:
+        raise CommandTimeoutError(SYSTEM_MESSAGES[code])
+    return False
+
+
+class ResponseCollector:
+    """
+    Assigns the returned frames of sent commands to the commands, in order of their
+    acknowledge messages. Measurement data frames in between are skipped.
+
+    Parameters
+    ----------
+    frames : List[bytes]
+        sent command frames
+    assembler : Union[None, FrameAssembler], optional
+        assembler of the connection, messages after the last acknowledge stay in it,
+        by default a new one
+    """
+
+    def __init__(
+        self, frames: List[bytes], assembler: Union[None, FrameAssembler] = None
+    ) -> None:
+        self.frames = frames
+        self.assembler = FrameAssembler() if assembler is None else assembler
+        self.responses = [[]]
+        self.done = False
+
+    def feed(self, data: Union[bytes, bytearray]) -> bool:
+        """
+        Parse received bytes.
+
+        Parameters
+        ----------
+        data : Union[bytes, bytearray]
+            received bytes
+
+        Returns
+        -------
+        bool
+            true as soon as all commands are acknowledged
+
+        Raises
+        ------
+        NotAcknowledgeError
+            if a command was not acknowledged
+        CommandTimeoutError
+            on a communication-timeout message
+        """
+        self.assembler.feed(data)
+        messages = self.assembler.messages
+        while messages and not self.done:
+            tag, payload = messages.pop(0)
+            if tag != SYSTEM_MESSAGE_TAG:
+                self.responses[-1].append((tag, payload))
+            elif check_system_message(payload[0], self.frames[len(self.responses) - 1]):
+                if len(self.responses) == len(self.frames):
+                    self.done = True
+                else:
+                    self.responses.append([])
+        return self.done
+
+    def timeout_error(self, timeout: float) -> CommandTimeoutError:
+        """
+        Error for commands that were not acknowledged within the timeout.
+
+        Parameters
+        ----------
+        timeout : float
+            waiting time in seconds
+
+        Returns
+        -------
+        CommandTimeoutError
+            error to raise
+        """
+        if len(self.frames) == 1:
+            return CommandTimeoutError(
+                f"No acknowledge within {timeout}s: {self.frames[0].hex(' ')}"
+            )
+        return CommandTimeoutError(
+            f"Only {len(self.responses) - 1} of {len(self.frames)} commands acknowledged within {timeout}s"
+        )
+
+
+def send_command(
+    serial,
+    frame: Union[bytes, bytearray],
+    timeout: float = 1.0,
+    prnt_msg: bool = False,
+) -> List[Tuple[int, bytes]]:
+    """
+    Send a command frame and return as soon as its acknowledge message is complete.
+    The response is parsed frame by frame ([CT] [LE] ... [CT]) while the bytes arrive.
+
+    Parameters
+    ----------
+    serial :
+        serial connection
+    frame : Union[bytes, bytearray]
+        command frame, e.g. bytes([0xD1, 0x00, 0xD1])
+    timeout : float, optional
+        maximum waiting time in seconds, by default 1.0
+    prnt_msg : bool, optional
+        print the acknowledge and the returned frames, by default False
+
+    Returns
+    -------
+    List[Tuple[int, bytes]]
+        returned frames as (command tag, data bytes) without system messages
+
+    Raises
+    ------
+    NotAcknowledgeError
+        if the command was not acknowledged
+    CommandTimeoutError
+        if no acknowledge arrived within the timeout
+    """
+    frame = bytes(frame)
+    collector = ResponseCollector([frame])
+    write_bytes(serial, frame)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if collector.feed(read_bytes(serial)):
+            responses = collector.responses[0]
+            if prnt_msg:
+                print(SYSTEM_MESSAGES[ACK])
+                for rsp_tag, rsp_payload in responses:
+                    print(f"{rsp_tag:02x}", rsp_payload.hex(" "))
+            return responses
+    raise collector.timeout_error(timeout)
+
+
+def send_commands(
+    serial,
+    frames: List[Union[bytes, bytearray]],
+    timeout: float = 1.0,
+) -> List[List[Tuple[int, bytes]]]:
+    """
+    Send several command frames with a single write and collect the responses in one pass.
+    The responses are assigned to the commands in order of their acknowledge messages.
+
+    Parameters
+    ----------
+    serial :
+        serial connection
+    frames : List[Union[bytes, bytearray]]
+        command frames
+    timeout : float, optional
+        maximum waiting time in seconds for all acknowledges, by default 1.0
+
+    Returns
+    -------
+    List[List[Tuple[int, bytes]]]
+        returned frames of every command as (command tag, data bytes)
+
+    Raises
+    ------
+    NotAcknowledgeError
+        if a command was not acknowledged
+    CommandTimeoutError
+        if not all acknowledges arrived within the timeout
+    """
+    frames = [bytes(frame) for frame in frames]
+    collector = ResponseCollector(frames)
+    write_bytes(serial, b"".join(frames))
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if collector.feed(read_bytes(serial)):
+            return collector.responses
+    raise collector.timeout_error(timeout)
@@ -3,62 +3,110 @@ from .sciopy_dataclasses import (
     ScioSpecMeasurementConfig,
     ScioSpecMeasurementSetup,
 )
+from .frame_decoding import FrameAssembler
+from .setup_m import SystemMessageCallback, invalidate_device_setup, _applied_setups
+from . import protocol
 from datetime import datetime
-import numpy as np
-from typing import Union
-import struct
+from functools import lru_cache
+from typing import Dict, List, Tuple, Union
+import copy
 
 
-def set_measurement_config(serial, ssms: ScioSpecMeasurementSetup) -> None:
+def injection_pairs(n_el: int, inj_skip: Union[int, list]) -> List[Tuple[int, int]]:
     """
-    set_measurement_config sets the ScioSpec device configuration depending on the ssms configuration dataclass.
+    Computes the injection electrode pairs [inj+, inj-] for a given electrode skip.
+
+    Parameters
+    ----------
+    n_el : int
+        number of injecting electrodes
+    inj_skip : Union[int, list]
+        injection electrode skip or list of skips
+
+    Returns
+    -------
+    List[Tuple[int, int]]
+        injection pairs
+    """
+    skips = inj_skip if type(inj_skip) == list else [inj_skip]
+    pairs = []
+    for sgl_inj_skip in skips:
+        pairs.extend((el, (el + sgl_inj_skip) % n_el + 1) for el in range(1, n_el + 1))
+    return pairs
+
+
+@lru_cache(maxsize=64)
+def _encode_config_sections(
+    burst_count: int,
+    amplitude: float,
+    adc_range: int,
+    gain: int,
+    framerate: float,
+    exc_freq: float,
+    n_el: int,
+    inj_skip: Union[int, tuple],
+) -> Dict[str, Tuple[bytes, ...]]:
+    """
+    Encodes the command frames of a setup, memoized by the setup fields.
+    """
+    if type(inj_skip) == tuple:
+        inj_skip = list(inj_skip)
+    return {
+        # Set measurement setup:
+        "reset": (protocol.RESET_SETUP,),
+        # Set burst count: "B0 03 02 00 03 B0" = 3
+        "burst_count": (protocol.set_burst_count(burst_count),),
+        # Excitation amplitude double precision
+        "amplitude": (protocol.set_amplitude(amplitude),),
+        # ADC range settings: [+/-1, +/-5, +/-10]
+        "adc_range": (
+            (protocol.set_adc_range(adc_range),)
+            if adc_range in protocol.ADC_RANGES
+            else ()
+        ),
+        # Gain settings: [1, 10, 100, 1_000]
+        "gain": (protocol.set_gain(gain),) if gain in protocol.GAINS else (),
+        # Single ended mode:
+        # Excitation switch type:
+        "mode": (protocol.set_single_ended(), protocol.set_excitation_switch()),
+        # Set framerate:
+        "framerate": (protocol.set_framerate(framerate),),
+        # Set frequencies:
+        # [CT] 0C 04 [fmin] [fmax] [fcount] [ftype] [CT]
+        "exc_freq": (protocol.set_frequencies(exc_freq, exc_freq, 1, 0),),
+        # Set injection config
+        "injection": tuple(
+            protocol.add_injection(v_el, g_el)
+            for v_el, g_el in injection_pairs(n_el, inj_skip)
+        ),
+        # Get measurement setup
+        # Set output configuration
+        "output": (
+            protocol.get_measurement_setup(0x03),
+            protocol.set_output_config(0x01),
+            protocol.set_output_config(0x03),
+            protocol.set_output_config(0x02),
+        ),
+    }
+
+
+def measurement_config_sections(
+    ssms: ScioSpecMeasurementSetup,
+) -> Dict[str, List[bytes]]:
+    """
+    Builds the command frames that set the ScioSpec device configuration of the ssms configuration dataclass,
+    grouped by the setting they configure. The frames are encoded once per distinct setup.
 
     Parameters
     ----------
-    serial : _type_
-        serial connection
     ssms : ScioSpecMeasurementSetup
         dataclass with the measurement setup settings.
-    """
 
-    def clTbt_sp(val: Union[int, float]) -> list:
-        """
-        clTbt_sp converts an integer or float value to a list of single precision bytes.
-
-        Parameters
-        ----------
-        val : Union[int, float]
-            Value that has to be converted
-
-        Returns
-        -------
-        list
-            list with single precision byte respresentation
-        """
-        return [int(bt) for bt in struct.pack(">f", val)]
-
-    def clTbt_dp(val: float) -> list:
-        """
-        clTbt_dp converts an integer or float value to a list of double precision bytes.
-
-        Parameters
-        ----------
-        val : float
-            value that has to be converted
-
-        Returns
-        -------
-        list
-            list with double precision byte respresentation
-        """
-        return [int(ele) for ele in struct.pack(">d", val)]
-
-    # Set measurement setup:
-    serial.write(bytearray([0xB0, 0x01, 0x01, 0xB0]))
-    # Set burst count: "B0 03 02 00 03 B0" = 3
-    serial.write(bytearray([0xB0, 0x03, 0x02, 0x00, ssms.burst_count, 0xB0]))
-
-    # Excitation amplitude double precision
+    Returns
+    -------
+    Dict[str, List[bytes]]
+        command frames per setting in the order they have to be sent
+    """
     # A_min = 100nA
     # A_max = 10mA
     if ssms.amplitude > 0.01:
@@ -66,81 +114,217 @@ def set_measurement_config(serial, ssms: ScioSpecMeasurementSetup) -> None:
             f"Amplitude {ssms.amplitude}A is out of available range.\nSet amplitude to 10mA."
         )
         ssms.amplitude = 0.01
-    serial.write(
-        bytearray(list(np.concatenate([[176, 9, 5], clTbt_dp(ssms.amplitude), [176]])))
+    inj_skip = tuple(ssms.inj_skip) if type(ssms.inj_skip) == list else ssms.inj_skip
+    sections = _encode_config_sections(
+        ssms.burst_count,
+        ssms.amplitude,
+        ssms.adc_range,
+        ssms.gain,
+        ssms.framerate,
+        ssms.exc_freq,
+        ssms.n_el,
+        inj_skip,
     )
+    return {setting: list(commands) for setting, commands in sections.items()}
 
-    # ADC range settings: [+/-1, +/-5, +/-10]
-    # ADC range = +/-1  : B0 02 0D 01 B0
-    # ADC range = +/-5  : B0 02 0D 02 B0
-    # ADC range = +/-10 : B0 02 0D 03 B0
-    if ssms.adc_range == 1:
-        serial.write(bytearray([0xB0, 0x02, 0x0D, 0x01, 0xB0]))
-    elif ssms.adc_range == 5:
-        serial.write(bytearray([0xB0, 0x02, 0x0D, 0x02, 0xB0]))
-    elif ssms.adc_range == 10:
-        serial.write(bytearray([0xB0, 0x02, 0x0D, 0x03, 0xB0]))
-
-    # Gain settings:
-    # Gain = 1     : B0 03 09 01 00 B0
-    # Gain = 10    : B0 03 09 01 01 B0
-    # Gain = 100   : B0 03 09 01 02 B0
-    # Gain = 1_000 : B0 03 09 01 03 B0
-    if ssms.gain == 1:
-        serial.write(bytearray([0xB0, 0x03, 0x09, 0x01, 0x00, 0xB0]))
-    elif ssms.gain == 10:
-        serial.write(bytearray([0xB0, 0x03, 0x09, 0x01, 0x01, 0xB0]))
-    elif ssms.gain == 100:
-        serial.write(bytearray([0xB0, 0x03, 0x09, 0x01, 0x02, 0xB0]))
-    elif ssms.gain == 1_000:
-        serial.write(bytearray([0xB0, 0x03, 0x09, 0x01, 0x03, 0xB0]))
-
-    # Single ended mode:
-    serial.write(bytearray([0xB0, 0x03, 0x08, 0x01, 0x01, 0xB0]))
-
-    # Excitation switch type:
-    serial.write(bytearray([0xB0, 0x02, 0x0C, 0x01, 0xB0]))
-
-    # Set framerate:
-    serial.write(
-        bytearray(list(np.concatenate([[176, 5, 3], clTbt_sp(ssms.framerate), [176]])))
-    )
 
-    # Set frequencies:
-    # [CT] 0C 04 [fmin] [fmax] [fcount] [ftype] [CT]
-    f_min = clTbt_sp(ssms.exc_freq)
-    f_max = clTbt_sp(ssms.exc_freq)
-    f_count = [0, 1]
-    f_type = [0]
-    # bytearray
-    serial.write(
-        bytearray(
-            list(np.concatenate([[176, 12, 4], f_min, f_max, f_count, f_type, [176]]))
-        )
-    )
+def measurement_config_commands(ssms: ScioSpecMeasurementSetup) -> List[bytes]:
+    """
+    Builds all command frames that set the ScioSpec device configuration of the ssms configuration dataclass.
+
+    Parameters
+    ----------
+    ssms : ScioSpecMeasurementSetup
+        dataclass with the measurement setup settings.
+
+    Returns
+    -------
+    List[bytes]
+        command frames in the order they have to be sent
+    """
+    sections = measurement_config_sections(ssms)
+    return [command for commands in sections.values() for command in commands]
+
+
+def config_update_commands(
+    applied: Union[None, ScioSpecMeasurementSetup], ssms: ScioSpecMeasurementSetup
+) -> List[bytes]:
+    """
+    Computes the command frames that change an applied device configuration to a new one.
+    The setup reset "B0 01 01 B0" clears the injection list and the frequency blocks on
+    the device. "B0 03 06" and "B0 0C 04" append to these lists, so a changed injection
+    pattern, a changed excitation frequency (or an unknown applied setup) requires the
+    full configuration.
+
+    Parameters
+    ----------
+    applied : Union[None, ScioSpecMeasurementSetup]
+        last applied measurement setup, None if unknown
+    ssms : ScioSpecMeasurementSetup
+        requested measurement setup
+
+    Returns
+    -------
+    List[bytes]
+        command frames, empty if nothing changed
+    """
+    sections = measurement_config_sections(ssms)
+    if (
+        applied is None
+        or applied.n_el != ssms.n_el
+        or applied.inj_skip != ssms.inj_skip
+        or applied.exc_freq != ssms.exc_freq
+    ):
+        return [command for commands in sections.values() for command in commands]
+    commands = []
+    for setting in [
+        "burst_count",
+        "amplitude",
+        "adc_range",
+        "gain",
+        "framerate",
+    ]:
+        if getattr(applied, setting) != getattr(ssms, setting):
+            commands.extend(sections[setting])
+    return commands
+
+
+def build_measurement_config(ssms: ScioSpecMeasurementSetup) -> Tuple[bytes, int]:
+    """
+    Assembles the full device configuration in one contiguous buffer.
+
+    Parameters
+    ----------
+    ssms : ScioSpecMeasurementSetup
+        dataclass with the measurement setup settings.
+
+    Returns
+    -------
+    Tuple[bytes, int]
+        configuration buffer and number of commands inside the buffer
+    """
+    commands = measurement_config_commands(ssms)
+    return b"".join(commands), len(commands)
+
+
+def verify_acknowledgements(received: Union[bytes, list], n_commands: int) -> bool:
+    """
+    Checks the response of a configuration upload in one pass.
+    Every command has to be answered with a command-acknowledge "18 01 83 18".
+
+    Parameters
+    ----------
+    received : Union[bytes, list]
+        received message buffer
+    n_commands : int
+        number of sent commands
+
+    Returns
+    -------
+    bool
+        true if all commands were acknowledged, false else
+    """
+    assembler = FrameAssembler()
+    assembler.feed(bytes(received))
+    codes = [payload[0] for tag, payload in assembler.messages if tag == 0x18]
+    n_ack = codes.count(0x83)
+    if n_ack != n_commands or n_ack != len(codes):
+        print(f"Acknowledged {n_ack} of {n_commands} commands, system messages:")
+        print([hex(code) for code in codes])
+        return False
+    return True
+
+
+def prepare_config_upload(
+    serial, ssms: ScioSpecMeasurementSetup, force: bool = False
+) -> Tuple[bytes, int]:
+    """
+    Builds the configuration upload for a serial connection.
+    Only the settings that differ from the last applied setup are included unless force is True.
+    If commands are sent, the applied setup is forgotten until `finish_config_upload()`
+    records the accepted upload.
+
+    Parameters
+    ----------
+    serial :
+        serial connection
+    ssms : ScioSpecMeasurementSetup
+        dataclass with the measurement setup settings.
+    force : bool, optional
+        always build the full configuration, by default False
 
-    # Set injection config
+    Returns
+    -------
+    Tuple[bytes, int]
+        configuration buffer and number of commands inside the buffer
+    """
+    applied = None if force else _applied_setups.get(serial)
+    commands = config_update_commands(applied, ssms)
+    if len(commands) != 0:
+        invalidate_device_setup(serial)
+    return b"".join(commands), len(commands)
 
-    if type(ssms.inj_skip) == int:
-        el_inj = np.arange(1, ssms.n_el + 1)
-        el_gnd = np.roll(el_inj, -(ssms.inj_skip + 1))
-        for v_el, g_el in zip(el_inj, el_gnd):
-            serial.write(bytearray([0xB0, 0x03, 0x06, v_el, g_el, 0xB0]))
 
-    if type(ssms.inj_skip) == list:
-        for sgl_inj_skip in ssms.inj_skip:
-            el_inj = np.arange(1, ssms.n_el + 1)
-            el_gnd = np.roll(el_inj, -(sgl_inj_skip + 1))
+def finish_config_upload(
+    serial, ssms: ScioSpecMeasurementSetup, accepted: Union[None, bool] = True
+) -> Union[None, bool]:
+    """
+    Remembers ssms as applied setup of a written configuration upload. A rejected
+    upload leaves the applied setup unknown, so the next upload is sent in full.
 
-            for v_el, g_el in zip(el_inj, el_gnd):
-                serial.write(bytearray([0xB0, 0x03, 0x06, v_el, g_el, 0xB0]))
+    Parameters
+    ----------
+    serial :
+        serial connection
+    ssms : ScioSpecMeasurementSetup
+        written measurement setup
+    accepted : Union[None, bool], optional
+        verification result, None if the upload was not verified, by default True
+
+    Returns
+    -------
+    Union[None, bool]
+        accepted
+    """
+    if accepted is False:
+        invalidate_device_setup(serial)
+    else:
+        _applied_setups[serial] = copy.deepcopy(ssms)
+    return accepted
+
+
+def set_measurement_config(
+    serial, ssms: ScioSpecMeasurementSetup, verify: bool = False, force: bool = False
+) -> Union[None, bool]:
+    """
+    set_measurement_config sets the ScioSpec device configuration depending on the ssms configuration dataclass.
+    All commands are sent with a single write. Settings that are unchanged since the last call are skipped.
 
-    # Get measurement setup
-    serial.write(bytearray([0xB1, 0x01, 0x03, 0xB1]))
-    # Set output configuration
-    serial.write(bytearray([0xB2, 0x02, 0x01, 0x01, 0xB2]))
-    serial.write(bytearray([0xB2, 0x02, 0x03, 0x01, 0xB2]))
-    serial.write(bytearray([0xB2, 0x02, 0x02, 0x01, 0xB2]))
+    Parameters
+    ----------
+    serial : _type_
+        serial connection
+    ssms : ScioSpecMeasurementSetup
+        dataclass with the measurement setup settings.
+    verify : bool, optional
+        read the response and verify all acknowledgements, by default False
+    force : bool, optional
+        resend the full configuration, by default False
+
+    Returns
+    -------
+    Union[None, bool]
+        None or the verification result if verify is True
+    """
+    buffer, n_commands = prepare_config_upload(serial, ssms, force)
+    if n_commands == 0:
+        return True if verify else None
+    serial.write(buffer)
+    accepted = None
+    if verify:
+        received = SystemMessageCallback(serial, prnt_msg=False, ret_hex_int="int")
+        accepted = verify_acknowledgements(received, n_commands)
+    return finish_config_upload(serial, ssms, accepted)
 
     ## start measurement
     # serial.write(bytearray([0xB4, 0x01, 0x01, 0xB4]))
@@ -148,6 +332,23 @@ def set_measurement_config(serial, ssms: ScioSpecMeasurementSetup) -> None:
     # serial.write(bytearray([0xB4, 0x01, 0x00, 0xB4]))
 
 
+def _write_fixed_config(serial, ssms: ScioSpecMeasurementSetup) -> None:
+    """
+    Writes the configuration of the `conf_n_el_*` presets in a single write.
+
+    Parameters
+    ----------
+    serial :
+        serial connection
+    ssms : ScioSpecMeasurementSetup
+        preset measurement setup
+    """
+    buffer, _ = build_measurement_config(ssms)
+    invalidate_device_setup(serial)
+    serial.write(buffer)
+    finish_config_upload(serial, ssms)
+
+
 def conf_n_el_16_adjacent(
     serial, cnf: ScioSpecMeasurementConfig
 ) -> ScioSpecMeasurementConfig:
@@ -164,75 +365,23 @@ def conf_n_el_16_adjacent(
     Channel Group 	1 (Inject+ : 1, Inject- : 1)
     Switch Type 	Reed Relays
     """
-
-    serial.write(bytearray([0xB0, 0x01, 0x01, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x02, 0x00, 0x0A, 0xB0]))
-    serial.write(
-        bytearray(
-            [
-                0xB0,
-                0x09,
-                0x05,
-                0x3F,
-                0x50,
-                0x62,
-                0x4D,
-                0xD2,
-                0xF1,
-                0xA9,
-                0xFC,
-                0xB0,
-            ]
-        )
+    _write_fixed_config(
+        serial,
+        ScioSpecMeasurementSetup(
+            burst_count=10,
+            total_meas_num=1,
+            n_el=16,
+            channel_group=[1],
+            exc_freq=10_000,
+            framerate=10,
+            amplitude=0.001,
+            inj_skip=0,
+            gain=1,
+            adc_range=5,
+            notes="conf_n_el_16_adjacent",
+            configured=True,
+        ),
     )
-    serial.write(bytearray([0xB0, 0x02, 0x0D, 0x02, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x09, 0x01, 0x00, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x08, 0x01, 0x01, 0xB0]))
-    serial.write(bytearray([0xB0, 0x02, 0x0C, 0x01, 0xB0]))
-    serial.write(bytearray([0xB0, 0x05, 0x03, 0x41, 0x20, 0x00, 0x00, 0xB0]))
-    serial.write(
-        bytearray(
-            [
-                0xB0,
-                0x0C,
-                0x04,
-                0x46,
-                0x1C,
-                0x40,
-                0x00,
-                0x46,
-                0x1C,
-                0x40,
-                0x00,
-                0x00,
-                0x01,
-                0x00,
-                0xB0,
-            ]
-        )
-    )
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x01, 0x02, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x02, 0x03, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x03, 0x04, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x04, 0x05, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x05, 0x06, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x06, 0x07, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x07, 0x08, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x08, 0x09, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x09, 0x0A, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x0A, 0x0B, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x0B, 0x0C, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x0C, 0x0D, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x0D, 0x0E, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x0E, 0x0F, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x0F, 0x10, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x10, 0x01, 0xB0]))
-    serial.write(bytearray([0xB1, 0x01, 0x03, 0xB1]))
-    serial.write(bytearray([0xB2, 0x02, 0x01, 0x01, 0xB2]))
-    serial.write(bytearray([0xB2, 0x02, 0x03, 0x01, 0xB2]))
-    serial.write(bytearray([0xB2, 0x02, 0x02, 0x01, 0xB2]))
-    # serial.write(bytearray([0xB4, 0x01, 0x01, 0xB4]))
-    # serial.write(bytearray([0xB4, 0x01, 0x00, 0xB4]))
     return ScioSpecMeasurementConfig(
         com_port=serial.name,
         burst_count=10,
@@ -267,74 +416,24 @@ def conf_n_el_16_opposite(
     Channel Group 	1 (Inject+ : 1, Inject- : 9)
     Switch Type 	Reed Relays
     """
-    serial.write(bytearray([0xB0, 0x01, 0x01, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x02, 0x00, 0x0A, 0xB0]))
-    serial.write(
-        bytearray(
-            [
-                0xB0,
-                0x09,
-                0x05,
-                0x3F,
-                0x50,
-                0x62,
-                0x4D,
-                0xD2,
-                0xF1,
-                0xA9,
-                0xFC,
-                0xB0,
-            ]
-        )
-    )
-    serial.write(bytearray([0xB0, 0x02, 0x0D, 0x02, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x09, 0x01, 0x00, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x08, 0x01, 0x01, 0xB0]))
-    serial.write(bytearray([0xB0, 0x02, 0x0C, 0x01, 0xB0]))
-    serial.write(bytearray([0xB0, 0x05, 0x03, 0x41, 0x20, 0x00, 0x00, 0xB0]))
-    serial.write(
-        bytearray(
-            [
-                0xB0,
-                0x0C,
-                0x04,
-                0x46,
-                0x1C,
-                0x40,
-                0x00,
-                0x46,
-                0x1C,
-                0x40,
-                0x00,
-                0x00,
-                0x01,
-                0x00,
-                0xB0,
-            ]
-        )
+    # The injection skip reproduces Inject- of the preset.
+    _write_fixed_config(
+        serial,
+        ScioSpecMeasurementSetup(
+            burst_count=10,
+            total_meas_num=1,
+            n_el=16,
+            channel_group=[1],
+            exc_freq=10_000,
+            framerate=10,
+            amplitude=0.001,
+            inj_skip=7,
+            gain=1,
+            adc_range=5,
+            notes="conf_n_el_16_opposite",
+            configured=True,
+        ),
     )
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x01, 0x09, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x02, 0x0A, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x03, 0x0B, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x04, 0x0C, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x05, 0x0D, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x06, 0x0E, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x07, 0x0F, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x08, 0x10, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x09, 0x01, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x0A, 0x02, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x0B, 0x03, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x0C, 0x04, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x0D, 0x05, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x0E, 0x06, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x0F, 0x07, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x10, 0x08, 0xB0]))
-    serial.write(bytearray([0xB1, 0x01, 0x03, 0xB1]))
-    serial.write(bytearray([0xB2, 0x02, 0x01, 0x01, 0xB2]))
-    serial.write(bytearray([0xB2, 0x02, 0x03, 0x01, 0xB2]))
-    serial.write(bytearray([0xB2, 0x02, 0x02, 0x01, 0xB2]))
-    # serial.write(bytearray([0xB4, 0x01, 0x01, 0xB4]))
-    # serial.write(bytearray([0xB4, 0x01, 0x00, 0xB4]))
     return ScioSpecMeasurementConfig(
         serial.name,
         burst_count=10,
@@ -369,90 +468,23 @@ def conf_n_el_32_adjacent(
     Channel Group 	1 (Inject+ : 1, Inject- : 2)
     Switch Type 	Reed Relays
     """
-    serial.write(bytearray([0xB0, 0x01, 0x01, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x02, 0x00, 0x01, 0xB0]))
-    serial.write(
-        bytearray(
-            [
-                0xB0,
-                0x09,
-                0x05,
-                0x3F,
-                0x50,
-                0x62,
-                0x4D,
-                0xD2,
-                0xF1,
-                0xA9,
-                0xFC,
-                0xB0,
-            ]
-        )
+    _write_fixed_config(
+        serial,
+        ScioSpecMeasurementSetup(
+            burst_count=1,
+            total_meas_num=1,
+            n_el=32,
+            channel_group=[1, 2],
+            exc_freq=10_000,
+            framerate=10,
+            amplitude=0.001,
+            inj_skip=0,
+            gain=1,
+            adc_range=5,
+            notes="conf_n_el_32_adjacent",
+            configured=True,
+        ),
     )
-    serial.write(bytearray([0xB0, 0x02, 0x0D, 0x02, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x09, 0x01, 0x00, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x08, 0x01, 0x01, 0xB0]))
-    serial.write(bytearray([0xB0, 0x02, 0x0C, 0x01, 0xB0]))
-    serial.write(bytearray([0xB0, 0x05, 0x03, 0x41, 0x20, 0x00, 0x00, 0xB0]))
-    serial.write(
-        bytearray(
-            [
-                0xB0,
-                0x0C,
-                0x04,
-                0x46,
-                0x1C,
-                0x40,
-                0x00,
-                0x46,
-                0x1C,
-                0x40,
-                0x00,
-                0x00,
-                0x01,
-                0x00,
-                0xB0,
-            ]
-        )
-    )
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x01, 0x02, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x02, 0x03, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x03, 0x04, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x04, 0x05, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x05, 0x06, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x06, 0x07, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x07, 0x08, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x08, 0x09, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x09, 0x0A, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x0A, 0x0B, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x0B, 0x0C, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x0C, 0x0D, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x0D, 0x0E, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x0E, 0x0F, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x0F, 0x10, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x10, 0x11, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x11, 0x12, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x12, 0x13, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x13, 0x14, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x14, 0x15, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x15, 0x16, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x16, 0x17, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x17, 0x18, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x18, 0x19, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x19, 0x1A, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x1A, 0x1B, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x1B, 0x1C, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x1C, 0x1D, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x1D, 0x1E, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x1E, 0x1F, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x1F, 0x20, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x20, 0x01, 0xB0]))
-    serial.write(bytearray([0xB1, 0x01, 0x03, 0xB1]))
-    serial.write(bytearray([0xB2, 0x02, 0x01, 0x01, 0xB2]))
-    serial.write(bytearray([0xB2, 0x02, 0x03, 0x01, 0xB2]))
-    serial.write(bytearray([0xB2, 0x02, 0x02, 0x01, 0xB2]))
-    # serial.write(bytearray([0xB4, 0x01, 0x01, 0xB4]))
-    # serial.write(bytearray([0xB4, 0x01, 0x00, 0xB4]))
     return ScioSpecMeasurementConfig(
         serial.name,
         burst_count=1,
@@ -487,90 +519,24 @@ def conf_n_el_32_opposite(
     Channel Group 	1 (Inject+ : 1, Inject- : 17)
     Switch Type 	Reed Relays
     """
-    serial.write(bytearray([0xB0, 0x01, 0x01, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x02, 0x00, 0x01, 0xB0]))
-    serial.write(
-        bytearray(
-            [
-                0xB0,
-                0x09,
-                0x05,
-                0x3F,
-                0x50,
-                0x62,
-                0x4D,
-                0xD2,
-                0xF1,
-                0xA9,
-                0xFC,
-                0xB0,
-            ]
-        )
-    )
-    serial.write(bytearray([0xB0, 0x02, 0x0D, 0x02, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x09, 0x01, 0x00, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x08, 0x01, 0x01, 0xB0]))
-    serial.write(bytearray([0xB0, 0x02, 0x0C, 0x01, 0xB0]))
-    serial.write(bytearray([0xB0, 0x05, 0x03, 0x41, 0x20, 0x00, 0x00, 0xB0]))
-    serial.write(
-        bytearray(
-            [
-                0xB0,
-                0x0C,
-                0x04,
-                0x46,
-                0x1C,
-                0x40,
-                0x00,
-                0x46,
-                0x1C,
-                0x40,
-                0x00,
-                0x00,
-                0x01,
-                0x00,
-                0xB0,
-            ]
-        )
+    # The injection skip reproduces Inject- of the preset.
+    _write_fixed_config(
+        serial,
+        ScioSpecMeasurementSetup(
+            burst_count=1,
+            total_meas_num=1,
+            n_el=32,
+            channel_group=[1, 2],
+            exc_freq=10_000,
+            framerate=10,
+            amplitude=0.001,
+            inj_skip=15,
+            gain=1,
+            adc_range=5,
+            notes="conf_n_el_32_opposite",
+            configured=True,
+        ),
     )
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x01, 0x11, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x02, 0x12, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x03, 0x13, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x04, 0x14, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x05, 0x15, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x06, 0x16, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x07, 0x17, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x08, 0x18, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x09, 0x19, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x0A, 0x1A, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x0B, 0x1B, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x0C, 0x1C, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x0D, 0x1D, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x0E, 0x1E, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x0F, 0x1F, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x10, 0x20, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x11, 0x01, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x12, 0x02, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x13, 0x03, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x14, 0x04, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x15, 0x05, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x16, 0x06, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x17, 0x07, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x18, 0x08, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x19, 0x09, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x1A, 0x0A, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x1B, 0x0B, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x1C, 0x0C, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x1D, 0x0D, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x1E, 0x0E, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x1F, 0x0F, 0xB0]))
-    serial.write(bytearray([0xB0, 0x03, 0x06, 0x20, 0x10, 0xB0]))
-    serial.write(bytearray([0xB1, 0x01, 0x03, 0xB1]))
-    serial.write(bytearray([0xB2, 0x02, 0x01, 0x01, 0xB2]))
-    serial.write(bytearray([0xB2, 0x02, 0x03, 0x01, 0xB2]))
-    serial.write(bytearray([0xB2, 0x02, 0x02, 0x01, 0xB2]))
-    # serial.write(bytearray([0xB4, 0x01, 0x01, 0xB4]))
-    # serial.write(bytearray([0xB4, 0x01, 0x00, 0xB4]))
     return ScioSpecMeasurementConfig(
         serial.name,
         burst_count=1,
@@ -0,0 +1,470 @@
+""" Chunked, appendable container for measurement samples"""
+
+import os
+import json
+import numpy as np
+from functools import lru_cache
+from typing import Dict, Iterator, List, Tuple, Union
+from .sciopy_dataclasses import FrameBatch
+from .sample_format import (
+    SAMPLE_FORMAT_VERSION,
+    _json_default,
+    config_from_json,
+    config_to_json,
+    load_sample,
+)
+
+DATASET_VERSION = 1
+HEADER_FILE = "header.json"
+META_FILE = "meta.jsonl"
+
+# Name of a dataset sample in `list_samples()`, like the file of `save_sample()`
+SAMPLE_NAME = "sample_{0:06d}"
+
+# Fields of a single burst of a FrameBatch
+FRAME_BATCH_FIELDS = (
+    "channels",
+    "excitation_stgs",
+    "frequency_row",
+    "timestamp",
+    "channel_group",
+)
+
+
+def _chunk_path(path: str, name: str, chunk: int) -> str:
+    return os.path.join(path, name, f"chunk_{chunk:06d}.bin")
+
+
+def _read_header(path: str) -> Union[None, dict]:
+    try:
+        with open(os.path.join(path, HEADER_FILE), "r") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
+
+
+class DatasetWriter:
+    """
+    Appends samples to a dataset directory. Every sample consists of arrays with a
+    fixed shape per field and a json serializable metadata dict.
+
+    Layout of the directory:
+
+    - `header.json`: format version, chunk size, dtype and shape of every field
+    - `<field>/chunk_<k>.bin`: raw C-ordered data of `chunk_size` samples
+    - `meta.jsonl`: one line of metadata per sample
+
+    A sample counts as written as soon as its metadata line is complete, so an
+    interrupted acquisition can be continued by opening the directory again.
+
+    Parameters
+    ----------
+    path : str
+        dataset directory, created if it does not exist
+    chunk_size : int, optional
+        samples per chunk file, by default 1024. Ignored for an existing dataset.
+    """
+
+    def __init__(self, path: str, chunk_size: int = 1024) -> None:
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.header = _read_header(path)
+        if self.header is not None:
+            chunk_size = self.header["chunk_size"]
+        self.chunk_size = chunk_size
+        self._files = {}
+        self._n_samples = self._recover()
+        self._meta = open(os.path.join(path, META_FILE), "a")
+
+    def _recover(self) -> int:
+        """
+        Cut off the data of samples whose metadata line was not completely written.
+
+        Returns
+        -------
+        int
+            number of complete samples
+        """
+        meta_path = os.path.join(self.path, META_FILE)
+        if not os.path.exists(meta_path):
+            return 0
+        with open(meta_path, "rb+") as file:
+            content = file.read()
+            complete = content.rfind(b"\n") + 1
+            file.truncate(complete)
+        n_samples = content.count(b"\n", 0, complete)
+        if self.header is None:
+            return n_samples
+        chunk, rows = divmod(n_samples, self.chunk_size)
+        for name, field in self.header["fields"].items():
+            stride = np.dtype(field["dtype"]).itemsize * int(np.prod(field["shape"]))
+            fname = _chunk_path(self.path, name, chunk)
+            if os.path.exists(fname):
+                os.truncate(fname, rows * stride)
+            following = chunk + 1
+            while os.path.exists(_chunk_path(self.path, name, following)):
+                os.remove(_chunk_path(self.path, name, following))
+                following += 1
+        return n_samples
+
+    def _create_header(self, arrays: Dict[str, np.ndarray]) -> None:
+        fields = {}
+        for name, array in arrays.items():
+            fields[name] = {"dtype": array.dtype.str, "shape": list(array.shape)}
+            os.makedirs(os.path.join(self.path, name), exist_ok=True)
+        self.header = {
+            "version": DATASET_VERSION,
+            "chunk_size": self.chunk_size,
+            "fields": fields,
+        }
+        with open(os.path.join(self.path, HEADER_FILE), "w") as file:
+            json.dump(self.header, file, indent=1)
+
+    def __len__(self) -> int:
+        return self._n_samples
+
+    def append(
+        self, arrays: Dict[str, np.ndarray], metadata: Union[None, dict] = None
+    ) -> int:
+        """
+        Append a single sample.
+
+        Parameters
+        ----------
+        arrays : Dict[str, np.ndarray]
+            array of every field, the fields and shapes are fixed by the first sample
+        metadata : Union[None, dict], optional
+            json serializable sample information, e.g. {"config": ssms}, by default None
+
+        Returns
+        -------
+        int
+            index of the sample
+
+        Raises
+        ------
+        ValueError
+            if the fields, shapes or dtypes do not match the dataset, nothing is written then
+        TypeError
+            if the metadata is not json serializable, nothing is written then
+        """
+        arrays = {name: np.asarray(array) for name, array in arrays.items()}
+        if self.header is None:
+            self._create_header(arrays)
+        fields = self.header["fields"]
+        if arrays.keys() != fields.keys():
+            raise ValueError(f"Expected the fields {list(fields)}, got {list(arrays)}")
+
+        # Validate all fields first, a rejected sample must not leave data behind.
+        encoded = {}
+        for name, field in fields.items():
+            array = arrays[name]
+            if list(array.shape) != field["shape"]:
+                raise ValueError(
+                    f"Field '{name}' has shape {array.shape}, expected {tuple(field['shape'])}"
+                )
+            if not np.can_cast(array.dtype, field["dtype"], casting="same_kind"):
+                raise ValueError(
+                    f"Field '{name}' has dtype {array.dtype}, expected {np.dtype(field['dtype'])}"
+                )
+            encoded[name] = np.ascontiguousarray(array, dtype=field["dtype"]).tobytes()
+        meta_line = json.dumps(metadata or {}, default=_json_default) + "\n"
+
+        chunk = self._n_samples // self.chunk_size
+        for name in fields:
+            file = self._files.get(name)
+            if file is None or file[0] != chunk:
+                if file is not None:
+                    file[1].close()
+                file = (chunk, open(_chunk_path(self.path, name, chunk), "ab"))
+                self._files[name] = file
+            file[1].write(encoded[name])
+
+        for _, file in self._files.values():
+            file.flush()
+        self._meta.write(meta_line)
+        self._meta.flush()
+        self._n_samples += 1
+        return self._n_samples - 1
+
+    def append_frame_batch(
+        self, batch: FrameBatch, metadata: Union[None, dict] = None
+    ) -> List[int]:
+        """
+        Append every burst of a FrameBatch as a single sample.
+
+        Parameters
+        ----------
+        batch : FrameBatch
+            measured bursts, e.g. of `sciospec_measurement(..., frame_batch=True)`
+        metadata : Union[None, dict], optional
+            json serializable information shared by all bursts, by default None
+
+        Returns
+        -------
+        List[int]
+            indices of the samples
+        """
+        return [
+            self.append(
+                {name: getattr(batch, name)[burst] for name in FRAME_BATCH_FIELDS},
+                metadata,
+            )
+            for burst in range(len(batch))
+        ]
+
+    def append_sample(
+        self,
+        batch: FrameBatch,
+        config,
+        metadata: Union[None, dict] = None,
+        burst: int = 0,
+    ) -> int:
+        """
+        Append one burst with its config, the dataset counterpart of `save_sample()`.
+
+        Parameters
+        ----------
+        batch : FrameBatch
+            measured bursts
+        config :
+            measurement config, e.g. ScioSpecMeasurementSetup
+        metadata : Union[None, dict], optional
+            json serializable sample information, e.g. {"enderstat": {...}}, by default None
+        burst : int, optional
+            burst of the batch, by default 0
+
+        Returns
+        -------
+        int
+            index of the sample
+        """
+        return self.append(
+            {name: getattr(batch, name)[burst] for name in FRAME_BATCH_FIELDS},
+            {"config_json": config_to_json(config), **(metadata or {})},
+        )
+
+    def close(self) -> None:
+        """
+        Close all open files.
+        """
+        for _, file in self._files.values():
+            file.close()
+        self._files = {}
+        self._meta.close()
+
+    def __enter__(self) -> "DatasetWriter":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class DatasetReader:
+    """
+    Random access to the samples of a dataset directory written by `DatasetWriter`.
+    The chunk files are memory mapped, so only the accessed samples are read.
+
+    Parameters
+    ----------
+    path : str
+        dataset directory
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.header = _read_header(path)
+        if self.header is None:
+            raise FileNotFoundError(f"No dataset header in {path}")
+        if self.header["version"] > DATASET_VERSION:
+            raise ValueError(
+                f"Dataset version {self.header['version']} is not supported"
+            )
+        self.chunk_size = self.header["chunk_size"]
+        self.fields = {
+            name: (np.dtype(field["dtype"]), tuple(field["shape"]))
+            for name, field in self.header["fields"].items()
+        }
+        with open(os.path.join(path, META_FILE), "r") as file:
+            # Only complete lines belong to written samples.
+            self.metadata = [json.loads(line) for line in file if line.endswith("\n")]
+        self._maps = {}
+
+    def __len__(self) -> int:
+        return len(self.metadata)
+
+    def _chunk(self, name: str, chunk: int) -> np.memmap:
+        key = (name, chunk)
+        if key not in self._maps:
+            dtype, shape = self.fields[name]
+            rows = min(self.chunk_size, len(self) - chunk * self.chunk_size)
+            self._maps[key] = np.memmap(
+                _chunk_path(self.path, name, chunk),
+                dtype=dtype,
+                mode="r",
+                shape=(rows,) + shape,
+            )
+        return self._maps[key]
+
+    def __getitem__(self, idx: int) -> Dict[str, Union[np.ndarray, dict]]:
+        """
+        Read a single sample.
+
+        Parameters
+        ----------
+        idx : int
+            sample index
+
+        Returns
+        -------
+        Dict[str, Union[np.ndarray, dict]]
+            array of every field and the metadata as "meta"
+        """
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError(f"Sample index {idx} out of range")
+        chunk, row = divmod(idx, self.chunk_size)
+        sample = {name: np.array(self._chunk(name, chunk)[row]) for name in self.fields}
+        sample["meta"] = self.metadata[idx]
+        return sample
+
+    def load_sample(self, idx: int) -> dict:
+        """
+        Read a sample in the layout of `load_sample()`.
+
+        Parameters
+        ----------
+        idx : int
+            sample index
+
+        Returns
+        -------
+        dict
+            "format_version", "config", the field arrays and the metadata entries
+        """
+        sample = self[idx]
+        metadata = dict(sample.pop("meta"))
+        if "config_json" in metadata:
+            config = config_from_json(metadata.pop("config_json"))
+        else:
+            config = metadata.pop("config", {})
+        loaded = {"format_version": SAMPLE_FORMAT_VERSION, "config": config}
+        loaded.update(metadata)
+        loaded.update(sample)
+        return loaded
+
+    def __iter__(self) -> Iterator[Dict[str, Union[np.ndarray, dict]]]:
+        for idx in range(len(self)):
+            yield self[idx]
+
+    def field(self, name: str, indices: Union[None, np.ndarray] = None) -> np.ndarray:
+        """
+        Read one field of several samples at once.
+
+        Parameters
+        ----------
+        name : str
+            field name
+        indices : Union[None, np.ndarray], optional
+            sample indices, by default all samples
+
+        Returns
+        -------
+        np.ndarray
+            stacked field values with shape (samples,) + field shape
+        """
+        dtype, shape = self.fields[name]
+        if indices is None:
+            indices = np.arange(len(self))
+        indices = np.asarray(indices)
+        out = np.empty((indices.size,) + shape, dtype=dtype)
+        chunks, rows = np.divmod(indices, self.chunk_size)
+        for chunk in np.unique(chunks):
+            sel = chunks == chunk
+            out[sel] = self._chunk(name, int(chunk))[rows[sel]]
+        return out
+
+
+def is_dataset(path: str) -> bool:
+    """
+    Check if a directory is a dataset of `DatasetWriter`.
+
+    Parameters
+    ----------
+    path : str
+        directory
+
+    Returns
+    -------
+    bool
+        true for a dataset, false for a directory of sample files
+    """
+    return os.path.exists(os.path.join(path, META_FILE))
+
+
+@lru_cache(maxsize=4)
+def _open_dataset(path: str, stamp: Tuple[int, int]) -> DatasetReader:
+    return DatasetReader(path)
+
+
+def open_dataset(path: str) -> DatasetReader:
+    """
+    DatasetReader of a dataset directory. The reader is reused by the calls of a
+    process until samples are appended, so the metadata is only parsed once.
+
+    Parameters
+    ----------
+    path : str
+        dataset directory
+
+    Returns
+    -------
+    DatasetReader
+        reader of the dataset
+    """
+    stat = os.stat(os.path.join(path, META_FILE))
+    return _open_dataset(os.path.normpath(path), (stat.st_size, stat.st_mtime_ns))
+
+
+def list_samples(lpath: str) -> List[str]:
+    """
+    Sorted sample names of a measurement directory, the file names of a directory
+    of sample files or "sample_<idx>" for every sample of a dataset directory.
+
+    Parameters
+    ----------
+    lpath : str
+        directory of sample files or dataset directory
+
+    Returns
+    -------
+    List[str]
+        sample names for `load_directory_sample()`
+    """
+    if not is_dataset(lpath):
+        return sorted(os.listdir(lpath))
+    if _read_header(lpath) is None:
+        return []
+    return [SAMPLE_NAME.format(idx) for idx in range(len(open_dataset(lpath)))]
+
+
+def load_directory_sample(lpath: str, name: str) -> dict:
+    """
+    Load a sample of a directory of sample files or of a dataset directory.
+
+    Parameters
+    ----------
+    lpath : str
+        directory of sample files or dataset directory
+    name : str
+        sample name of `list_samples()`
+
+    Returns
+    -------
+    dict
+        sample in the layout of `load_sample()`
+    """
+    if is_dataset(lpath):
+        return open_dataset(lpath).load_sample(int(name.rsplit("_", 1)[-1]))
+    return load_sample(os.path.join(lpath, name))
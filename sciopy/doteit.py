@@ -1,10 +1,17 @@
 """ Convert a .eit file to python sctructured data"""
 
 import os
+import hashlib
+import json
 import numpy as np
 import pickle
+from concurrent.futures import ProcessPoolExecutor
+from tqdm import tqdm
+from typing import Callable, Dict, Tuple, Union
 from .sciopy_dataclasses import SingleEitFrame
 
+# Increase if a change of the parser changes the converted files.
+DOTEIT_PARSER_VERSION = 1
 
 header_keys = [
     "number_of_header",
@@ -44,24 +51,45 @@ def doteit_in_SingleEitFrame(read_content: list) -> SingleEitFrame:
     """
     frame = SingleEitFrame()
 
-    for content, key in zip(read_content, header_keys):
+    header, inj_pairs, values = doteit_to_arrays(read_content)
+    for key, content in header.items():
         # Inserting header part
         setattr(frame, key, content)
     frame.f_scale = "linear" if frame.f_scale == 0 else "logarithmic"
 
-    for i in range(len(header_keys), len(read_content) - 1, 2):
-        el_cmb = read_content[i].split(" ")
-        el_cmb = f"{el_cmb[0]}_{el_cmb[1]}"
-        lct = read_content[i + 1].split("\t")
-        lct = [ele.replace("E", "e") for ele in lct]
-        lct = [float(ele) for ele in lct]
-        fin_val = np.zeros(len(lct) // 2, dtype=complex)
-        for idx, cmpl in enumerate(range(0, len(lct), 2)):
-            fin_val[idx] = complex(lct[cmpl], lct[cmpl + 1])
-        setattr(frame, el_cmb, np.array(fin_val))
+    for (inj_p, inj_n), fin_val in zip(inj_pairs, values):
+        setattr(frame, f"{inj_p}_{inj_n}", fin_val)
     return frame
 
 
+def doteit_to_arrays(read_content: list) -> Tuple[dict, np.ndarray, np.ndarray]:
+    """
+    Parses the content of a .eit file with a single bulk conversion of the numeric block.
+    The interleaved real and imaginary parts are reinterpreted as complex values.
+
+    Parameters
+    ----------
+    read_content : list
+        lines of the .eit file
+
+    Returns
+    -------
+    Tuple[dict, np.ndarray, np.ndarray]
+        header, injection pairs with shape (n, 2) and complex values with shape (n, m)
+    """
+    header = dict(zip(header_keys, read_content))
+    n_cmb = len(range(len(header_keys), len(read_content) - 1, 2))
+    body = read_content[len(header_keys) : len(header_keys) + 2 * n_cmb]
+
+    inj_pairs = np.array(
+        [line.split(" ")[:2] for line in body[0::2]], dtype=int
+    ).reshape(n_cmb, 2)
+    if n_cmb == 0:
+        return header, inj_pairs, np.empty((0, 0), dtype=complex)
+    values = np.loadtxt(body[1::2], dtype=np.float64, delimiter="\t", ndmin=2)
+    return header, inj_pairs, values.view(complex)
+
+
 def list_eit_files(path: str) -> list:
     """
     Returns a list of all .eit files in the directory path.
@@ -100,7 +128,7 @@ def list_all_files(path: str) -> None:
     print(os.listdir(path))
 
 
-def single_eit_in_pickle(fname: str, s_path: str) -> None:
+def single_eit_in_pickle(fname: str, s_path: str) -> str:
     """
     Dumps the .eit information to a pickle file.
 
@@ -113,15 +141,18 @@ def single_eit_in_pickle(fname: str, s_path: str) -> None:
 
     Returns
     -------
-    None
+    str
+        path of the pickle file
     """
     with open(fname, "r") as file:
         read_content = file.read().split("\n")
 
     frame = doteit_in_SingleEitFrame(read_content)
 
-    with open(f"{s_path}/{frame.setup_name}.pickle", "wb") as f:
+    out = f"{s_path}/{frame.setup_name}.pickle"
+    with open(out, "wb") as f:
         pickle.dump(frame, f)
+    return out
 
 
 def load_pickle_to_dict(path: str) -> dict:
@@ -142,9 +173,268 @@ def load_pickle_to_dict(path: str) -> dict:
     return tmp
 
 
-def convert_fulldir_doteit_to_pickle(lpath: str, spath: str) -> None:
+def single_eit_in_npz(fname: str, s_path: str) -> str:
+    """
+    Saves the .eit information to a .npz file.
+
+    Parameters
+    ----------
+    fname : str
+        name of the file
+    s_path : str
+        save path
+
+    Returns
+    -------
+    str
+        path of the .npz file
+    """
+    with open(fname, "r") as file:
+        read_content = file.read().split("\n")
+
+    frame = doteit_in_SingleEitFrame(read_content)
+    out = f"{s_path}{frame.setup_name}.npz"
+    np.savez(out, **(frame.__dict__))
+    return out
+
+
+def file_sha256(fname: str) -> str:
+    """
+    Content hash of a file.
+
+    Parameters
+    ----------
+    fname : str
+        name of the file
+
+    Returns
+    -------
+    str
+        hex digest of the sha256 hash
+    """
+    sha = hashlib.sha256()
+    with open(fname, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def manifest_path(spath: str) -> str:
+    """
+    Path of the conversion manifest that is stored next to the output directory.
+
+    Parameters
+    ----------
+    spath : str
+        save path
+
+    Returns
+    -------
+    str
+        path of the manifest file
+    """
+    return f"{os.path.normpath(spath)}_manifest.json"
+
+
+def load_manifest(spath: str) -> dict:
+    """
+    Load the conversion manifest of an output directory.
+
+    Parameters
+    ----------
+    spath : str
+        save path
+
+    Returns
+    -------
+    dict
+        manifest entry of every converted file, empty if no manifest exists
+    """
+    try:
+        with open(manifest_path(spath), "r") as file:
+            return json.load(file)["files"]
+    except FileNotFoundError:
+        return {}
+
+
+def _save_manifest(spath: str, files: dict) -> None:
+    """
+    Write the conversion manifest, replacing the old one only if writing succeeded.
+
+    Parameters
+    ----------
+    spath : str
+        save path
+    files : dict
+        manifest entry of every converted file
+    """
+    path = manifest_path(spath)
+    with open(path + ".tmp", "w") as file:
+        json.dump({"files": files}, file, indent=1)
+    os.replace(path + ".tmp", path)
+
+
+def _is_unchanged(fname: str, entry: Union[None, dict]) -> bool:
+    """
+    Check a file against its manifest entry. The content hash is only computed
+    if the size matches but the modification time changed.
+
+    Parameters
+    ----------
+    fname : str
+        name of the file
+    entry : Union[None, dict]
+        manifest entry of the file
+
+    Returns
+    -------
+    bool
+        true if the file does not need to be converted again
+    """
+    if entry is None or entry["parser_version"] != DOTEIT_PARSER_VERSION:
+        return False
+    if not os.path.exists(entry["output"]):
+        return False
+    stat = os.stat(fname)
+    if stat.st_size != entry["size"]:
+        return False
+    if stat.st_mtime_ns == entry["mtime_ns"]:
+        return True
+    if file_sha256(fname) == entry["sha256"]:
+        # Touched, but not changed.
+        entry["mtime_ns"] = stat.st_mtime_ns
+        return True
+    return False
+
+
+def _convert_single_eit(
+    converter: Callable[[str, str], str], fname: str, s_path: str, hashed: bool
+) -> Tuple[Union[None, dict], Union[None, str]]:
+    """
+    Runs a single file conversion and returns the error instead of raising it.
+
+    Parameters
+    ----------
+    converter : Callable[[str, str], str]
+        `single_eit_in_pickle` or `single_eit_in_npz`
+    fname : str
+        name of the file
+    s_path : str
+        save path
+    hashed : bool
+        add the size, mtime and content hash of the file for the manifest
+
+    Returns
+    -------
+    Tuple[Union[None, dict], Union[None, str]]
+        manifest entry or None, None or the error message
+    """
+    try:
+        entry = {}
+        if hashed:
+            stat = os.stat(fname)
+            entry["size"] = stat.st_size
+            entry["mtime_ns"] = stat.st_mtime_ns
+            entry["sha256"] = file_sha256(fname)
+        entry["output"] = converter(fname, s_path)
+        entry["parser_version"] = DOTEIT_PARSER_VERSION
+        return entry, None
+    except Exception as err:
+        return None, f"{type(err).__name__}: {err}"
+
+
+def _convert_fulldir(
+    converter: Callable[[str, str], str],
+    lpath: str,
+    spath: str,
+    n_workers: int,
+    chunksize: int,
+    incremental: bool,
+) -> Dict[str, str]:
+    """
+    Converts all .eit files of lpath serially or with a process pool.
+
+    Parameters
+    ----------
+    converter : Callable[[str, str], str]
+        single file conversion
+    lpath : str
+        load path
+    spath : str
+        save path
+    n_workers : int
+        number of worker processes, 1 converts in the calling process
+    chunksize : int
+        number of files per submitted task
+    incremental : bool
+        skip the files that are unchanged according to the manifest and update it
+
+    Returns
+    -------
+    Dict[str, str]
+        error message of every file that could not be converted
+    """
+    manifest = load_manifest(spath) if incremental else {}
+    all_objects = list_eit_files(lpath)
+    objects = [
+        obj
+        for obj in all_objects
+        if not (incremental and _is_unchanged(lpath + obj, manifest.get(obj)))
+    ]
+    if incremental:
+        print(f"\t Skipped {len(all_objects) - len(objects)} unchanged files.")
+    fnames = [lpath + obj for obj in objects]
+    errors = {}
+    done = 0
+    args = (
+        [converter] * len(fnames),
+        fnames,
+        [spath] * len(fnames),
+        [incremental] * len(fnames),
+    )
+    executor = ProcessPoolExecutor(max_workers=n_workers) if n_workers > 1 else None
+    interrupted = False
+    try:
+        if executor is None:
+            results = map(_convert_single_eit, *args)
+        else:
+            results = executor.map(_convert_single_eit, *args, chunksize=chunksize)
+        # The results arrive in the order of the files.
+        for obj, (entry, error) in tqdm(zip(objects, results), total=len(objects)):
+            done += 1
+            if error is not None:
+                errors[obj] = error
+                manifest.pop(obj, None)
+            else:
+                manifest[obj] = entry
+    except KeyboardInterrupt:
+        interrupted = True
+        raise
+    finally:
+        if executor is not None:
+            # On Ctrl-C the queued files are dropped instead of converted.
+            executor.shutdown(wait=not interrupted, cancel_futures=interrupted)
+        # Keeps the progress of an interrupted run.
+        if incremental:
+            _save_manifest(spath, manifest)
+        print(f"\t Converted {done - len(errors)} of {len(objects)} files.")
+        for obj, error in errors.items():
+            print(f"\t Failed: {obj} -> {error}")
+    return errors
+
+
+def convert_fulldir_doteit_to_pickle(
+    lpath: str,
+    spath: str,
+    n_workers: int = 1,
+    chunksize: int = 16,
+    incremental: bool = False,
+) -> Dict[str, str]:
     """
     Converts all .eit files in a directory to .pickle files in a directory spath.
+    Files that can not be converted are skipped and reported.
+    With `incremental=True` a manifest next to spath records the converted files
+    and only new or changed files and files converted by an older parser are converted.
 
     Parameters
     ----------
@@ -152,22 +442,37 @@ def convert_fulldir_doteit_to_pickle(lpath: str, spath: str) -> None:
         load path
     spath : str
         save path
+    n_workers : int, optional
+        number of worker processes, by default 1
+    chunksize : int, optional
+        number of files per submitted task, by default 16
+    incremental : bool, optional
+        skip the files that are unchanged since the last conversion, by default False
 
     Returns
     -------
-    None
+    Dict[str, str]
+        error message of every file that could not be converted
     """
-    objects = list_eit_files(lpath)
-    for obj in objects:
-        fname = lpath + obj
-        single_eit_in_pickle(fname, spath)
-        print("converted:", obj)
+    errors = _convert_fulldir(
+        single_eit_in_pickle, lpath, spath, n_workers, chunksize, incremental
+    )
     print("\t Saved in", spath)
+    return errors
 
 
-def convert_fulldir_doteit_to_npz(lpath: str, spath: str) -> None:
+def convert_fulldir_doteit_to_npz(
+    lpath: str,
+    spath: str,
+    n_workers: int = 1,
+    chunksize: int = 16,
+    incremental: bool = False,
+) -> Dict[str, str]:
     """
     Converts all .eit files in a directory to .npz files in a directory spath.
+    Files that can not be converted are skipped and reported.
+    With `incremental=True` a manifest next to spath records the converted files
+    and only new or changed files and files converted by an older parser are converted.
 
     Parameters
     ----------
@@ -175,16 +480,18 @@ def convert_fulldir_doteit_to_npz(lpath: str, spath: str) -> None:
         load path
     spath : str
         save path
+    n_workers : int, optional
+        number of worker processes, by default 1
+    chunksize : int, optional
+        number of files per submitted task, by default 16
+    incremental : bool, optional
+        skip the files that are unchanged since the last conversion, by default False
 
     Returns
     -------
-    None
+    Dict[str, str]
+        error message of every file that could not be converted
     """
-    objects = list_eit_files(lpath)
-    for obj in objects:
-        fname = lpath + obj
-        with open(fname, "r") as file:
-            read_content = file.read().split("\n")
-
-        frame = doteit_in_SingleEitFrame(read_content)
-        np.savez(f"{spath}{frame.setup_name}.npz", **(frame.__dict__))
+    return _convert_fulldir(
+        single_eit_in_npz, lpath, spath, n_workers, chunksize, incremental
+    )
@@ -0,0 +1,346 @@
+import numpy as np
+from typing import List, Union
+from .sciopy_dataclasses import ScioSpecMeasurementSetup, FrameBatch, SingleFrame
+
+# Layout of a single measurement data frame (140 bytes):
+# [B4] [LE] [CG] [ESout] [ESin] [FR FR] [TS TS TS TS] 16 x ([Re] [Im]) [B4]
+FRAME_DTYPE = np.dtype(
+    [
+        ("start_tag", "u1"),
+        ("length", "u1"),
+        ("channel_group", "u1"),
+        ("excitation_stgs", "u1", (2,)),
+        ("frequency_row", ">u2"),
+        ("timestamp", ">u4"),
+        ("channels", ">f4", (16, 2)),
+        ("end_tag", "u1"),
+    ]
+)
+FRAME_TAG = 0xB4
+FRAME_LENGTH = FRAME_DTYPE.itemsize  # 140 bytes
+
+
+def _aligned_frames(buffer: np.ndarray) -> bool:
+    """
+    Check whether a byte buffer consists of back-to-back data frames only.
+
+    Parameters
+    ----------
+    buffer : np.ndarray
+        uint8 view of the message buffer
+
+    Returns
+    -------
+    bool
+        true if every 140 byte block starts and ends with the frame tag
+    """
+    if buffer.size % FRAME_LENGTH != 0:
+        return False
+    blocks = buffer.reshape(-1, FRAME_LENGTH)
+    return bool(
+        np.all(blocks[:, 0] == FRAME_TAG) and np.all(blocks[:, -1] == FRAME_TAG)
+    )
+
+
+def _walk_frames(raw: bytes, final: bool = True) -> tuple:
+    """
+    Walk a message buffer frame by frame using the [CT] [LE] ... [CT] framing.
+
+    Parameters
+    ----------
+    raw : bytes
+        message buffer
+    final : bool, optional
+        if false an incomplete frame at the end is left for the next call, by default True
+
+    Returns
+    -------
+    tuple
+        (start indices of the data frames, list of (tag, payload) of all other frames, consumed bytes)
+    """
+    starts = []
+    messages = []
+    idx = 0
+    while idx + 2 < len(raw):
+        tag = raw[idx]
+        end = idx + raw[idx + 1] + 3
+        if end > len(raw) and not final:
+            # Wait for the rest of the frame.
+            break
+        if end > len(raw) or raw[end - 1] != tag:
+            # Lost the framing, resync on the next byte.
+            idx += 1
+            continue
+        if tag == FRAME_TAG and end - idx == FRAME_LENGTH:
+            starts.append(idx)
+        else:
+            messages.append((tag, raw[idx + 2 : end - 1]))
+        idx = end
+    return starts, messages, idx
+
+
+def _take_frames(buffer: np.ndarray, starts: list) -> np.ndarray:
+    """
+    Gather the data frames at the given start indices.
+
+    Parameters
+    ----------
+    buffer : np.ndarray
+        uint8 view of the message buffer
+    starts : list
+        start indices of the data frames
+
+    Returns
+    -------
+    np.ndarray
+        uint8 buffer with back-to-back data frames
+    """
+    if len(starts) == 0:
+        return np.empty(0, dtype=np.uint8)
+    take = np.asarray(starts)[:, None] + np.arange(FRAME_LENGTH)
+    return buffer[take].reshape(-1)
+
+
+def decode_frames(buffer: Union[bytes, bytearray, np.ndarray]) -> np.ndarray:
+    """
+    Decode all measurement data frames of a raw message buffer at once.
+
+    Parameters
+    ----------
+    buffer : Union[bytes, bytearray, np.ndarray]
+        raw message buffer received from the device
+
+    Returns
+    -------
+    np.ndarray
+        structured array with dtype `FRAME_DTYPE`, one entry per frame
+    """
+    buffer = np.frombuffer(buffer, dtype=np.uint8)
+    if not _aligned_frames(buffer):
+        # System messages like "18 01 92 18" (data holdup) are dropped.
+        starts, _, _ = _walk_frames(buffer.tobytes())
+        buffer = _take_frames(buffer, starts)
+    return buffer.view(FRAME_DTYPE)
+
+
+class FrameAssembler:
+    """
+    Reassembles data frames from a byte stream that is received in arbitrary chunks.
+    Non data frames (e.g. acknowledge or data holdup messages) are collected in `messages`.
+    """
+
+    def __init__(self) -> None:
+        self._pending = b""
+        self.messages = []
+
+    def feed(self, data: Union[bytes, bytearray]) -> np.ndarray:
+        """
+        Append received bytes and decode all frames that are complete.
+
+        Parameters
+        ----------
+        data : Union[bytes, bytearray]
+            received bytes
+
+        Returns
+        -------
+        np.ndarray
+            structured array with dtype `FRAME_DTYPE` of the completed frames
+        """
+        raw = self._pending + bytes(data)
+        starts, messages, consumed = _walk_frames(raw, final=False)
+        self.messages.extend(messages)
+        self._pending = raw[consumed:]
+        buffer = _take_frames(np.frombuffer(raw, dtype=np.uint8), starts)
+        return buffer.view(FRAME_DTYPE)
+
+
+class BurstAssembler:
+    """
+    Assembles the bursts of a running measurement from a byte stream that is received
+    in arbitrary chunks. Frames of other channel groups are dropped and at most
+    `burst_count` bursts are returned. Non data frames are collected in `messages`.
+
+    Parameters
+    ----------
+    ssms : ScioSpecMeasurementSetup
+        dataclass with the measurement setup settings
+    """
+
+    def __init__(self, ssms: ScioSpecMeasurementSetup) -> None:
+        n_inj = len(ssms.inj_skip) if type(ssms.inj_skip) == list else 1
+        self.frames_per_burst = ssms.n_el * n_inj * len(ssms.channel_group)
+        self.channel_group = ssms.channel_group
+        self.burst_count = ssms.burst_count
+        self.bursts = 0
+        self._assembler = FrameAssembler()
+        self._pending = np.empty(0, dtype=FRAME_DTYPE)
+
+    @property
+    def messages(self) -> list:
+        return self._assembler.messages
+
+    @property
+    def complete(self) -> bool:
+        return self.bursts >= self.burst_count
+
+    def feed(self, data: Union[bytes, bytearray]) -> List[FrameBatch]:
+        """
+        Append received bytes and return the bursts that are complete.
+
+        Parameters
+        ----------
+        data : Union[bytes, bytearray]
+            received bytes
+
+        Returns
+        -------
+        List[FrameBatch]
+            single burst frame batches
+        """
+        frames = self._assembler.feed(data)
+        frames = frames[np.isin(frames["channel_group"], self.channel_group)]
+        self._pending = np.concatenate([self._pending, frames])
+        batches = []
+        while self._pending.shape[0] >= self.frames_per_burst and not self.complete:
+            batches.append(
+                frames_to_frame_batch(self._pending[None, : self.frames_per_burst])
+            )
+            self._pending = self._pending[self.frames_per_burst :]
+            self.bursts += 1
+        return batches
+
+
+def frame_channels(frames: np.ndarray) -> np.ndarray:
+    """
+    Convert the big-endian channel pairs of decoded frames to complex values.
+
+    Parameters
+    ----------
+    frames : np.ndarray
+        structured array with dtype `FRAME_DTYPE`
+
+    Returns
+    -------
+    np.ndarray
+        complex64 array with shape frames.shape + (16,)
+    """
+    pairs = np.ascontiguousarray(frames["channels"], dtype=np.float32)
+    return pairs.view(np.complex64)[..., 0]
+
+
+def decode_bursts(
+    buffer: Union[bytes, bytearray, np.ndarray], ssms: ScioSpecMeasurementSetup
+) -> np.ndarray:
+    """
+    Binary alternative to `reshape_full_message_in_bursts()` and `split_bursts_in_frames()`.
+    Takes the raw message buffer of `StartStopMeasurement_usb_hs(serial, raw=True)`,
+    decodes all frames and splits them depending on the burst count.
+
+    Parameters
+    ----------
+    buffer : Union[bytes, bytearray, np.ndarray]
+        raw message buffer
+    ssms : ScioSpecMeasurementSetup
+        dataclass object with the measurement setup
+
+    Returns
+    -------
+    np.ndarray
+        structured array with shape (burst_count, frames per burst)
+    """
+    frames = decode_frames(buffer)
+    # Select the right channel group data
+    frames = frames[np.isin(frames["channel_group"], ssms.channel_group)]
+    frames_per_burst = frames.shape[0] // ssms.burst_count
+    return frames[: frames_per_burst * ssms.burst_count].reshape(
+        ssms.burst_count, frames_per_burst
+    )
+
+
+def frames_to_frame_batch(frames: np.ndarray) -> FrameBatch:
+    """
+    Merge the decoded frames of `decode_bursts()` to a columnar FrameBatch.
+
+    Parameters
+    ----------
+    frames : np.ndarray
+        structured array with shape (burst_count, frames per burst)
+
+    Returns
+    -------
+    FrameBatch
+        columnar frame storage
+    """
+    n_bursts = frames.shape[0]
+    n_groups = max(np.unique(frames["channel_group"]).size, 1)
+    n_stages = frames.shape[1] // n_groups
+    frames = frames[:, : n_stages * n_groups]
+    # Order the frames of each burst by channel group, stable for the stages.
+    order = np.argsort(frames["channel_group"], axis=1, kind="stable")
+    frames = np.take_along_axis(frames, order, axis=1)
+    frames = frames.reshape(n_bursts, n_groups, n_stages).transpose(0, 2, 1)
+
+    channels = frame_channels(frames).reshape(n_bursts, n_stages, n_groups * 16)
+    return FrameBatch(
+        channels=channels,
+        excitation_stgs=frames["excitation_stgs"][:, :, 0].astype(np.int64),
+        frequency_row=frames["frequency_row"][:, :, 0].astype(np.int64),
+        timestamp=frames["timestamp"].astype(np.int64),
+        channel_group=frames["channel_group"].astype(np.int64),
+    )
+
+
+def single_frames_to_frame_batch(frames: List[SingleFrame]) -> FrameBatch:
+    """
+    Convert the SingleFrame list of one burst, e.g. the "data" of a sample file
+    written with `sciospec_measurement()`, to a single burst FrameBatch.
+
+    Parameters
+    ----------
+    frames : List[SingleFrame]
+        frames of one burst
+
+    Returns
+    -------
+    FrameBatch
+        columnar frame storage with one burst
+    """
+    decoded = np.zeros(len(frames), dtype=FRAME_DTYPE)
+    if len(frames) == 0:
+        return frames_to_frame_batch(decoded[None, :])
+    decoded["channel_group"] = [frame.channel_group for frame in frames]
+    decoded["excitation_stgs"] = [frame.excitation_stgs for frame in frames]
+    decoded["frequency_row"] = [
+        (int(str(frame.frequency_row[0]), 16) << 8)
+        | int(str(frame.frequency_row[1]), 16)
+        for frame in frames
+    ]
+    decoded["timestamp"] = [frame.timestamp for frame in frames]
+    channels = np.array(
+        [[frame.__dict__[f"ch_{ch}"] for ch in range(1, 17)] for frame in frames],
+        dtype=np.complex128,
+    )
+    decoded["channels"] = channels.view(np.float64).reshape(-1, 16, 2)
+    return frames_to_frame_batch(decoded[None, :])
+
+
+def decode_frame_batch(
+    buffer: Union[bytes, bytearray, np.ndarray], ssms: ScioSpecMeasurementSetup
+) -> FrameBatch:
+    """
+    Decode the raw message buffer of a measurement directly to a FrameBatch.
+
+    Parameters
+    ----------
+    buffer : Union[bytes, bytearray, np.ndarray]
+        raw message buffer
+    ssms : ScioSpecMeasurementSetup
+        dataclass object with the measurement setup
+
+    Returns
+    -------
+    FrameBatch
+        columnar frame storage
+    """
+    return frames_to_frame_batch(decode_bursts(buffer, ssms))
@@ -1,3 +1,4 @@
+from functools import lru_cache
 from typing import Union
 import matplotlib.pyplot as plt
 import numpy as np
@@ -77,6 +78,111 @@ def add_circle_anomaly(
     return mesh_new
 
 
+class MeshTemplate:
+    """
+    Empty mesh that is shared by all samples of a measurement. The element centroids
+    are computed once, so the permittivity of many circle anomalies can be rasterized
+    at once without creating a mesh object per sample.
+
+    Parameters
+    ----------
+    mesh_obj : PyEITMesh
+        empty mesh, e.g. of `create_empty_2d_mesh()`
+    """
+
+    def __init__(self, mesh_obj: PyEITMesh) -> None:
+        self.mesh = mesh_obj
+        self.elem_centers = mesh_obj.elem_centers[:, :2]
+        self.background = mesh_obj.perm * np.ones(mesh_obj.n_elems)
+
+    def circle_perm_arrays(
+        self,
+        x_center: Union[float, np.ndarray],
+        y_center: Union[float, np.ndarray],
+        radius: Union[float, np.ndarray],
+        perm: float = 10,
+    ) -> np.ndarray:
+        """
+        Permittivity of every element for one or more circle anomalies,
+        equal to the perm_array of `add_circle_anomaly()`.
+
+        Parameters
+        ----------
+        x_center : Union[float, np.ndarray]
+            x-center point of the circle anomalies
+        y_center : Union[float, np.ndarray]
+            y-center point of the circle anomalies
+        radius : Union[float, np.ndarray]
+            radius of the anomalies in percent relating the unit circle
+        perm : float, optional
+            permittivity of the circle anomalies, by default 10
+
+        Returns
+        -------
+        np.ndarray
+            permittivity with shape (anomalies, elements)
+        """
+        x_center = np.atleast_1d(x_center)[:, None]
+        y_center = np.atleast_1d(y_center)[:, None]
+        radius = np.atleast_1d(radius)[:, None]
+        dist = np.sqrt(
+            (self.elem_centers[:, 0] - x_center) ** 2
+            + (self.elem_centers[:, 1] - y_center) ** 2
+        )
+        return np.where(dist - radius < 0, perm, self.background)
+
+    def to_mesh(self, perm_array: np.ndarray) -> PyEITMesh:
+        """
+        Mesh object with the given permittivity, e.g. a stored "perm_array" of a prepared sample.
+
+        Parameters
+        ----------
+        perm_array : np.ndarray
+            permittivity of every element
+
+        Returns
+        -------
+        PyEITMesh
+            pyeit mesh object
+        """
+        return PyEITMesh(
+            node=self.mesh.node,
+            element=self.mesh.element,
+            perm=perm_array,
+            el_pos=self.mesh.el_pos,
+            ref_node=self.mesh.ref_node,
+        )
+
+
+@lru_cache(maxsize=8)
+def mesh_template(
+    n_el: int = 16,
+    h0: float = 0.1,
+    z_level: Union[int, float] = 0,
+    default_perm: float = 1.0,
+) -> MeshTemplate:
+    """
+    Empty mesh template, created once per process and set of parameters.
+
+    Parameters
+    ----------
+    n_el : int, optional
+        number of used electrodes, by default 16
+    h0 : float, optional
+        mesh refinement, by default 0.1
+    z_level : Union[int, float], optional
+        z-level of this 2d mesh, by default 0
+    default_perm : float
+        empty ground permittivity value
+
+    Returns
+    -------
+    MeshTemplate
+        cached mesh template
+    """
+    return MeshTemplate(create_empty_2d_mesh(n_el, h0, z_level, default_perm))
+
+
 def plot_mesh(
     mesh_obj: PyEITMesh, figsize: tuple = (6, 4), title: str = "mesh"
 ) -> None:
@@ -1,10 +1,24 @@
-from sciopy.prepare_data import comp_tank_relative_r_phi
+from .prepare_data import (
+    comp_tank_relative_r_phi,
+    extract_potentials,
+    sample_excitation_stgs,
+)
+from .sample_format import _config_value, sample_config
+from .dataset import list_samples, load_directory_sample
+from .sample_index import load_index
 import numpy as np
 import os
-from typing import Union
+import warnings
+from typing import Callable, Dict, Tuple, Union
 import pandas as pd
 from tqdm import tqdm
 
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
 s_dict_n_el_16 = {
     "n_sample": [],
     "datetime": [],
@@ -111,6 +125,79 @@ def clear_s_dict(s_dict: dict) -> dict:
     return s_dict
 
 
+def sample_rows(sample, r: float = 0, phi: float = 0) -> dict:
+    """
+    Builds the CSV rows of a single measurement sample, one row per excitation stage
+    with the merged potentials of all channel groups (el_1, ..., el_n_el).
+
+    Parameters
+    ----------
+    sample :
+        single measurement sample of `load_sample()` or `np.load()`
+    r : float, optional
+        radial position written to every row, by default 0
+    phi : float, optional
+        angular position written to every row, by default 0
+
+    Returns
+    -------
+    dict
+        column arrays in the order of `s_dict_n_el_16` or `s_dict_n_el_32`
+    """
+    config = sample_config(sample)
+    potentials = extract_potentials(sample)
+    excitation = sample_excitation_stgs(sample)
+    n_rows, n_el = potentials.shape
+    saline_conductivity = _config_value(config, "saline_conductivity")
+
+    def column(value) -> list:
+        return [value] * n_rows
+
+    rows = {
+        "n_sample": column(_config_value(config, "actual_sample")),
+        "datetime": column(_config_value(config, "datetime")),
+        "n_el": column(n_el),
+        "n_el_skip": column(excitation[0, 1] - excitation[0, 0]),
+        "channel_group": column(_config_value(config, "channel_group")),
+        "object": column(_config_value(config, "object")),
+        "size": column(_config_value(config, "size")),
+        "material": column(_config_value(config, "material")),
+        "water_lvl": column(_config_value(config, "water_lvl")),
+        "r": column(r),
+        "phi": column(phi),
+        "saline_conductivity": column(
+            None if saline_conductivity is None else saline_conductivity[0]
+        ),
+        "temperature": column(_config_value(config, "temperature")),
+        "exc_freq": column(_config_value(config, "exc_freq")),
+        "inj_el_vcc": excitation[:, 0],
+        "inj_el_gnd": excitation[:, 1],
+    }
+    for el in range(n_el):
+        rows[f"el_{el+1}"] = potentials[:, el]
+    return rows
+
+
+def _radius_name(r: float) -> str:
+    """
+    Partition name of a radial position, e.g. "r_10.5_mm". The radius of
+    `comp_tank_relative_r_phi()` is rounded to 0.01 mm and kept with all digits.
+    """
+    return f"r_{float(r):g}_mm"
+
+
+def _split_rows(sample, r_split: float) -> Union[None, dict]:
+    """
+    Rows of a sample, None if the sample is not at the radial position r_split.
+    """
+    if r_split == -1.0:
+        return sample_rows(sample)
+    r, phi = comp_tank_relative_r_phi(sample)
+    if r != float(r_split) or r_split < 0:
+        return None
+    return sample_rows(sample, r, phi)
+
+
 def single_measurement_to_csv_n_el_16(
     sample: np.lib.npyio.NpzFile,
     s_dict_n_el_16: dict,
@@ -129,75 +216,194 @@ def single_measurement_to_csv_n_el_16(
     r_split : float, optional
         only write a given radial value to the s_dict_n_el_16, by default -1.0,
         if default, the radial position is not inspected.
-    material : str, optional
-        material of the measurement object, by default "PLA"
-    saline_conductivity : float, optional
-        saline conductivity, by default 99.9
-    temperature : float, optional
-        environment temperature, by default 22.1
 
     Returns
     -------
     dict
         appended saving dictionary
     """
-    config = sample["config"].tolist()
-    if r_split != -1.0:
-        r, phi = comp_tank_relative_r_phi(sample)
-    if r_split == -1.0:
-        r = -1
+    rows = _split_rows(sample, r_split)
+    if rows is not None:
+        for key, values in rows.items():
+            s_dict_n_el_16[key].extend(values)
+    return s_dict_n_el_16
 
-    if r == float(r_split) and r_split >= 0:
-        n_el_skip = (
-            sample["data"].tolist()[0].excitation_stgs[1]
-            - sample["data"].tolist()[0].excitation_stgs[0]
-        )
 
-        for frame in sample["data"].tolist():
-            s_dict_n_el_16["n_sample"].append(config.actual_sample)
-            s_dict_n_el_16["datetime"].append(config.datetime)
-            s_dict_n_el_16["n_el"].append(config.n_el)
-            s_dict_n_el_16["n_el_skip"].append(n_el_skip)
-            s_dict_n_el_16["channel_group"].append(config.channel_group)
-            s_dict_n_el_16["object"].append(config.object)
-            s_dict_n_el_16["size"].append(config.size)
-            s_dict_n_el_16["material"].append(config.material)
-            s_dict_n_el_16["r"].append(r)
-            s_dict_n_el_16["phi"].append(phi)
-            s_dict_n_el_16["water_lvl"].append(config.water_lvl)
-            s_dict_n_el_16["saline_conductivity"].append(config.saline_conductivity[0])
-            s_dict_n_el_16["temperature"].append(config.temperature)
-            s_dict_n_el_16["exc_freq"].append(config.exc_freq)
-            s_dict_n_el_16["inj_el_vcc"].append(frame.excitation_stgs[0])
-            s_dict_n_el_16["inj_el_gnd"].append(frame.excitation_stgs[1])
-            for el in range(config.n_el):
-                s_dict_n_el_16[f"el_{el+1}"].append(frame.__dict__[f"ch_{el+1}"])
-    if r_split == -1.0:
-        n_el_skip = (
-            sample["data"].tolist()[0].excitation_stgs[1]
-            - sample["data"].tolist()[0].excitation_stgs[0]
+class _TableWriter:
+    """
+    Appends DataFrame chunks to a CSV or Parquet file.
+    """
+
+    def __init__(self, fname: str, file_format: str) -> None:
+        self.fname = fname
+        self.file_format = file_format
+        self._parquet = None
+        self._header = True
+
+    def write(self, df: pd.DataFrame) -> None:
+        if self.file_format == "csv":
+            df.to_csv(
+                self.fname,
+                mode="w" if self._header else "a",
+                header=self._header,
+                index=False,
+            )
+            self._header = False
+            return
+        # Arrow has no complex type, the potentials are split into real and imaginary part.
+        for col in [col for col in df.columns if col.startswith("el_")]:
+            loc = df.columns.get_loc(col)
+            values = df.pop(col).to_numpy()
+            df.insert(loc, f"{col}_imag", np.imag(values))
+            df.insert(loc, f"{col}_real", np.real(values))
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self._parquet is None:
+            self._parquet = pq.ParquetWriter(self.fname, table.schema)
+        self._parquet.write_table(table)
+
+    def close(self) -> None:
+        if self._parquet is not None:
+            self._parquet.close()
+
+
+def _export_partitions(
+    lpath: str,
+    file_format: str,
+    chunk_size: int,
+    route: Callable[[dict], Union[None, Tuple[str, dict]]],
+) -> Dict[str, str]:
+    """
+    Reads every sample of lpath once and appends its rows to the output file that
+    `route` selects. Every output file buffers at most `chunk_size` samples.
+
+    Parameters
+    ----------
+    lpath : str
+        load path, a directory of sample files or a dataset directory
+    file_format : str
+        "csv" or "parquet"
+    chunk_size : int
+        number of samples per written chunk
+    route : Callable[[dict], Union[None, Tuple[str, dict]]]
+        returns (output file name without extension, rows) of a sample or None to skip it
+
+    Returns
+    -------
+    Dict[str, str]
+        path of every written file
+    """
+    if file_format not in ("csv", "parquet"):
+        raise ValueError(f"Unknown file format: {file_format}")
+    if file_format == "parquet" and pa is None:
+        raise ImportError(
+            "The Parquet export requires pyarrow, install it with "
+            "`pip install sciopy[parquet]`."
         )
 
-        for frame in sample["data"].tolist():
-            s_dict_n_el_16["n_sample"].append(config.actual_sample)
-            s_dict_n_el_16["datetime"].append(config.datetime)
-            s_dict_n_el_16["n_el"].append(config.n_el)
-            s_dict_n_el_16["n_el_skip"].append(n_el_skip)
-            s_dict_n_el_16["channel_group"].append(config.channel_group)
-            s_dict_n_el_16["object"].append(config.object)
-            s_dict_n_el_16["size"].append(config.size)
-            s_dict_n_el_16["material"].append(config.material)
-            s_dict_n_el_16["r"].append(0)
-            s_dict_n_el_16["phi"].append(0)
-            s_dict_n_el_16["saline_conductivity"].append(config.saline_conductivity[0])
-            s_dict_n_el_16["temperature"].append(config.temperature)
-            s_dict_n_el_16["exc_freq"].append(config.exc_freq)
-            s_dict_n_el_16["inj_el_vcc"].append(frame.excitation_stgs[0])
-            s_dict_n_el_16["inj_el_gnd"].append(frame.excitation_stgs[1])
-            for el in range(config.n_el):
-                s_dict_n_el_16[f"el_{el+1}"].append(frame.__dict__[f"ch_{el+1}"])
+    s_dir = f"{lpath[:-1]}_{file_format}"
+    os.makedirs(s_dir, exist_ok=True)
+    writers = {}
+    frames = {}
+    try:
+        for ch_mod, ele in tqdm(enumerate(list_samples(lpath))):
+            if ch_mod % 10 == 0:
+                continue
+            routed = route(load_directory_sample(lpath, ele))
+            if routed is None:
+                continue
+            name, rows = routed
+            if name not in writers:
+                writers[name] = _TableWriter(
+                    f"{s_dir}/{name}.{file_format}", file_format
+                )
+                frames[name] = []
+            frames[name].append(pd.DataFrame(rows))
+            if len(frames[name]) == chunk_size:
+                writers[name].write(pd.concat(frames[name], ignore_index=True))
+                frames[name] = []
+        for name, writer in writers.items():
+            if frames[name]:
+                writer.write(pd.concat(frames[name], ignore_index=True))
+    finally:
+        for writer in writers.values():
+            writer.close()
+    return {name: writer.fname for name, writer in writers.items()}
 
-    return s_dict_n_el_16
+
+def export_measurement_directory(
+    lpath: str,
+    file_format: str = "csv",
+    r_split: float = -1.0,
+    chunk_size: int = 256,
+) -> str:
+    """
+    Streams all samples of a measurement directory with 16, 32, 48 or 64 electrodes
+    into a single CSV or Parquet file. The rows of `chunk_size` samples are written
+    at once, so the memory usage does not grow with the directory.
+
+    Parameters
+    ----------
+    lpath : str
+        load path
+    file_format : str, optional
+        "csv" or "parquet" (requires the extra sciopy[parquet]), by default "csv".
+        Parquet stores the potentials as el_<n>_real and el_<n>_imag columns.
+    r_split : float, optional
+        only write samples with the given radial value, by default -1.0,
+        if default, the radial position is not inspected.
+    chunk_size : int, optional
+        number of samples per written chunk, by default 256
+
+    Returns
+    -------
+    str
+        path of the written file
+    """
+    if float(r_split) == -1.0:
+        name = "full"
+    else:
+        name = _radius_name(r_split)
+
+    def route(sample: dict) -> Union[None, Tuple[str, dict]]:
+        rows = _split_rows(sample, r_split)
+        return None if rows is None else (name, rows)
+
+    written = _export_partitions(lpath, file_format, chunk_size, route)
+    return written.get(name, f"{lpath[:-1]}_{file_format}/{name}.{file_format}")
+
+
+def export_measurement_directory_r_split(
+    lpath: str, file_format: str = "csv", chunk_size: int = 256
+) -> Dict[str, str]:
+    """
+    Streams all samples of a measurement directory into one CSV or Parquet file per
+    radial object position ("r_<r>_mm"). Every sample is read only once.
+
+    The files are keyed by the full radius, which is rounded to 0.01 mm, e.g. the
+    radii 10.0 and 10.5 are written to "r_10_mm" and "r_10.5_mm". Up to version
+    0.7.1.3 the files were named by the truncated radius `int(r)`, so radii with
+    the same integer part overwrote each other's file and only the last one was kept.
+
+    Parameters
+    ----------
+    lpath : str
+        load path
+    file_format : str, optional
+        "csv" or "parquet" (requires the extra sciopy[parquet]), by default "csv"
+    chunk_size : int, optional
+        maximum number of buffered samples per radial position, by default 256
+
+    Returns
+    -------
+    Dict[str, str]
+        path of the written file of every radial position
+    """
+
+    def route(sample: dict) -> Tuple[str, dict]:
+        r, phi = comp_tank_relative_r_phi(sample)
+        return _radius_name(r), sample_rows(sample, r, phi)
+
+    return _export_partitions(lpath, file_format, chunk_size, route)
 
 
 def convert_measurement_directory_n_el_16(
@@ -209,6 +415,7 @@ def convert_measurement_directory_n_el_16(
     """
     Converts all samples inside a measurement directory to a new generated
     directory or returns the corresponding dict.
+    The CSV export is streamed by `export_measurement_directory()`.
 
     Parameters
     ----------
@@ -228,36 +435,24 @@ def convert_measurement_directory_n_el_16(
         depending on export_csv nothing or the appended data dictionary
     """
 
+    if export_csv is True:
+        s_p_name = export_measurement_directory(lpath, "csv", r_split=r_split)
+        print(f"Saved at:\n\t{s_p_name}")
+        return
+
     if len(s_dict_n_el_16["n_sample"]) != 0:
         # clear directory
         print("clearing: s_dict_n_el_16")
         s_dict_n_el_16 = clear_s_dict(s_dict_n_el_16)
 
-    for ch_mod, ele in tqdm(enumerate(np.sort(os.listdir(lpath)))):
+    for ch_mod, ele in tqdm(enumerate(list_samples(lpath))):
         if ch_mod % 10 != 0:
-            tmp_sample = np.load(lpath + ele, allow_pickle=True)
+            tmp_sample = load_directory_sample(lpath, ele)
             s_dict_n_el_16 = single_measurement_to_csv_n_el_16(
                 tmp_sample, s_dict_n_el_16, r_split=r_split
             )
-
-    if export_csv is True:
-        try:
-            os.mkdir(f"{lpath[:-1]}_csv")
-            print(f"Created save directory at:\n\t{lpath[:-1]}_csv/")
-        except BaseException:
-            pass
-        # save the data to csv
-
-        df = pd.DataFrame(s_dict_n_el_16)
-        if float(r_split) == -1.0:
-            s_p_name = f"{lpath[:-1]}_csv/full.csv"
-        else:
-            s_p_name = f"{lpath[:-1]}_csv/r_{int(r_split)}_mm.csv"
-        df.to_csv(s_p_name, index=False)
-
-    if export_csv is False:
-        # return the dictionary
-        return s_dict_n_el_16
+    # return the dictionary
+    return s_dict_n_el_16
 
 
 def get_radial_positions(lpath: str) -> np.ndarray:
@@ -275,35 +470,34 @@ def get_radial_positions(lpath: str) -> np.ndarray:
         array with the measured radial positions
     """
     print("Finding the measured radial positions:\n")
-    radial_posis = []
-    for ele in tqdm(os.listdir(lpath)):
-        tmp_sample = np.load(lpath + ele, allow_pickle=True)
-        r, _ = comp_tank_relative_r_phi(tmp_sample)
-        radial_posis.append(r)
-    radial_posis = np.unique(radial_posis)
+    radial_posis = np.unique(load_index(lpath)["r"])
     print(f"Returning:\n\t {radial_posis}")
     return radial_posis
 
 
 def convert_measurement_directory_n_el_16_r_split(
-    lpath: str, s_dict_n_el_16: dict
+    lpath: str, s_dict_n_el_16: Union[None, dict] = None
 ) -> None:
     """
     convert_measurement_directory_n_el_16_r_split does the full conversion of a
     data set and writes CSV data depending on the measured radiants.
     The reason for the splis is the resulting size of the .CSV files.
+    Every sample is read once, see `export_measurement_directory_r_split()` for
+    the grouping of the radii.
 
     Parameters
     ----------
     lpath : str
-        _description_
-    s_dict_n_el_16 : dict
-        _description_
+        load path
+    s_dict_n_el_16 : Union[None, dict], optional
+        deprecated and unused, by default None
     """
-    for r_splits in get_radial_positions(lpath):
-        convert_measurement_directory_n_el_16(
-            lpath=lpath,
-            s_dict_n_el_16=s_dict_n_el_16,
-            r_split=r_splits,
-            export_csv=True,
+    if s_dict_n_el_16 is not None:
+        warnings.warn(
+            "s_dict_n_el_16 is unused and will be removed from "
+            "convert_measurement_directory_n_el_16_r_split",
+            DeprecationWarning,
+            stacklevel=2,
         )
+    for s_p_name in export_measurement_directory_r_split(lpath, "csv").values():
+        print(f"Saved at:\n\t{s_p_name}")
@@ -1,10 +1,18 @@
 import os
+import json
 import math
 from tqdm import tqdm
 import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+from typing import Dict, List, Tuple, Union
 
 from .sciopy_dataclasses import PreperationConfig
-from .meshing import create_empty_2d_mesh, add_circle_anomaly
+from .frame_decoding import single_frames_to_frame_batch
+from .sample_format import sample_config
+from .dataset import is_dataset, list_samples, load_directory_sample
+from .meshing import mesh_template
 
 
 def create_prep_directory(prep_cnf: PreperationConfig) -> str:
@@ -21,7 +29,7 @@ def create_prep_directory(prep_cnf: PreperationConfig) -> str:
     str
         updated PreperationConfig
     """
-    prep_cnf.n_samples = len(os.listdir(prep_cnf.lpath))
+    prep_cnf.n_samples = len(list_samples(prep_cnf.lpath))
     prep_cnf.spath = prep_cnf.lpath[:-1] + str("_prepared/")
     try:
         os.mkdir(prep_cnf.spath[:-1])
@@ -33,6 +41,30 @@ def create_prep_directory(prep_cnf: PreperationConfig) -> str:
     return prep_cnf
 
 
+def extract_potentials(sample) -> np.ndarray:
+    """
+    Extracts the potential matrix of a sample with 16, 32, 48 or 64 electrodes.
+    The frames of all channel groups of one excitation stage are merged into one row.
+
+    Parameters
+    ----------
+    sample :
+        single measurement sample of `load_sample()` or `np.load()`, pickled or pickle-free
+
+    Returns
+    -------
+    np.ndarray
+        complex potential matrix with shape (stages, n_el)
+    """
+    config = sample_config(sample)
+    n_el = config["n_el"] if isinstance(config, dict) else config.n_el
+    if "channels" in sample:
+        channels = sample["channels"]
+    else:
+        channels = single_frames_to_frame_batch(sample["data"]).channels[0]
+    return channels[:, :n_el].astype(complex)
+
+
 def extract_potentials_from_sample_n_el_16(
     sample: np.lib.npyio.NpzFile,
 ) -> np.ndarray:
@@ -49,15 +81,7 @@ def extract_potentials_from_sample_n_el_16(
     np.ndarray
         potential matrix
     """
-    sample_data_shape_0 = sample["data"].shape[0]
-    n_el = sample["config"].tolist().n_el
-
-    pot_matrix = np.empty((sample_data_shape_0, 16), dtype=complex)
-
-    for stage in range(sample_data_shape_0):
-        for el in range(n_el):
-            pot_matrix[stage, el] = sample["data"][stage].__dict__[f"ch_{el+1}"]
-    return pot_matrix
+    return extract_potentials(sample)
 
 
 def comp_tank_relative_r_phi(
@@ -70,7 +94,7 @@ def comp_tank_relative_r_phi(
     Parameters
     ----------
     sample : np.lib.npyio.NpzFile
-        single sample
+        single sample of `np.load()` or `load_sample()`
     ender_x_y_center : float, optional
         center position of Ender5 x,y-axis, by default 180.0
 
@@ -79,8 +103,11 @@ def comp_tank_relative_r_phi(
     tuple
         tank relative object position
     """
-    x_abs = sample["enderstat"].tolist()["abs_x_pos"] - ender_x_y_center
-    y_abs = sample["enderstat"].tolist()["abs_y_pos"] - ender_x_y_center
+    enderstat = sample["enderstat"]
+    if isinstance(enderstat, np.ndarray):
+        enderstat = enderstat.tolist()
+    x_abs = enderstat["abs_x_pos"] - ender_x_y_center
+    y_abs = enderstat["abs_y_pos"] - ender_x_y_center
 
     r = np.round(np.sqrt(x_abs**2 + y_abs**2), 2)
     # Pay attention to the phi position due to the phantom tank alignment.
@@ -110,13 +137,30 @@ def check_n_el_condition(
         true if condition is fulfiled, false else
     """
 
-    rand_sample = np.load(
-        prep_cnf.lpath
-        + "sample_{0:06d}.npz".format(np.random.randint(0, prep_cnf.n_samples)),
-        allow_pickle=True,
-    )
-    set_ch_group = rand_sample["config"].tolist().channel_group
-    set_n_el = rand_sample["config"].tolist().n_el
+    # sample_index imports this module
+    from .sample_index import index_path, load_index, sample_metadata
+
+    indexed = is_dataset(prep_cnf.lpath) or os.path.exists(index_path(prep_cnf.lpath))
+    n_samples = prep_cnf.n_samples
+    if indexed:
+        # An existing index is only read, not updated.
+        index = load_index(prep_cnf.lpath, update=False)
+        n_samples = min(n_samples, len(index))
+    if n_samples == 0:
+        print("\tError: No samples found!")
+        return False
+    rand_idx = np.random.randint(0, n_samples)
+    if indexed:
+        rand_sample = index.iloc[rand_idx]
+    else:
+        rand_sample = sample_metadata(
+            prep_cnf.lpath + "sample_{0:06d}.npz".format(rand_idx)
+        )
+    if pd.isna(rand_sample["channel_group"]):
+        print("\tError: Data has no channel group!")
+        return False
+    set_ch_group = json.loads(rand_sample["channel_group"])
+    set_n_el = rand_sample["n_el"]
     if set_ch_group == ch_group_to_check and set_n_el == n_el_to_check:
         return True
     else:
@@ -124,49 +168,87 @@ def check_n_el_condition(
         return False
 
 
+def sample_excitation_stgs(sample) -> np.ndarray:
+    """
+    Excitation settings [ESout, ESin] of every excitation stage of a sample.
+
+    Parameters
+    ----------
+    sample :
+        single measurement sample of `load_sample()` or `np.load()`, pickled or pickle-free
+
+    Returns
+    -------
+    np.ndarray
+        excitation electrodes with shape (stages, 2)
+    """
+    if "excitation_stgs" in sample:
+        return sample["excitation_stgs"]
+    return single_frames_to_frame_batch(sample["data"]).excitation_stgs[0]
+
+
+@lru_cache(maxsize=64)
+def _excitation_mask(stgs: bytes, n_stages: int, n_el: int) -> np.ndarray:
+    """
+    Boolean mask of the non excitation electrodes of one injection pattern.
+    """
+    excitation = np.frombuffer(stgs, dtype=np.int64).reshape(n_stages, 2)
+    mask = np.ones((n_stages, n_el), dtype=bool)
+    np.put_along_axis(mask, excitation - 1, False, axis=-1)
+    mask.flags.writeable = False
+    return mask
+
+
 def extract_electrodepotentials(
     potential_matrix: np.ndarray,
-    sample: np.lib.npyio.NpzFile,
+    sample: Union[np.lib.npyio.NpzFile, np.ndarray],
     del_ex_stgs: bool = True,
 ) -> np.array:
     """
     Extracts the electrode signal without the corresponding excitation stages.
+    A batch of potential matrices with shape (..., stages, n_el) is processed at once.
 
     Parameters
     ----------
     potential_matrix : np.ndarray
-        potential matrix
-    sample : np.lib.npyio.NpzFile
-        sample description
+        potential matrix with shape (stages, n_el) or (..., stages, n_el)
+    sample : Union[np.lib.npyio.NpzFile, np.ndarray]
+        sample description or the excitation settings with shape (stages, 2),
+        or (..., stages, 2) for a batch with different injection patterns
     del_ex_stgs : bool, optional
         delete the excitations or not, by default True
 
     Returns
     -------
     np.array
-        electrode signal
+        electrode signal with shape (..., stages * n_el) or (..., stages * (n_el - 2))
     """
-    p_mat_shape = potential_matrix.shape
+    *batch_shape, n_stages, n_el = potential_matrix.shape
 
     if del_ex_stgs is False:
-        return np.reshape(potential_matrix, (p_mat_shape[0] * p_mat_shape[1],))
-    if del_ex_stgs is True:
-        resh_pot = np.reshape(potential_matrix, (p_mat_shape[0] * p_mat_shape[1],))
-        del_idx = []
-        for r, dat in enumerate(sample["data"]):
-            del_idx.append((dat.excitation_stgs - 1) + p_mat_shape[1] * r)
-        del_idx = np.concatenate(del_idx)
-        return np.delete(resh_pot, del_idx)
+        return np.reshape(potential_matrix, (*batch_shape, n_stages * n_el))
+    excitation = (
+        sample if isinstance(sample, np.ndarray) else sample_excitation_stgs(sample)
+    )
+    excitation = np.asarray(excitation, dtype=np.int64)
+    if excitation.ndim == 2:
+        mask = _excitation_mask(excitation.tobytes(), n_stages, n_el)
+        mask = np.broadcast_to(mask, potential_matrix.shape)
+    else:
+        mask = np.ones(potential_matrix.shape, dtype=bool)
+        np.put_along_axis(mask, excitation - 1, False, axis=-1)
+    return potential_matrix[mask].reshape(*batch_shape, -1)
 
 
 def norm_data(data: np.ndarray, low_bound: int = 0, high_bound: int = 1) -> np.ndarray:
     """
     Normalise data to a given boundary. If the data is complex the absolute value ist computed.
+    A batch is normalised along the last axis.
 
     Parameters
     ----------
     data : np.ndarray
-        data
+        data with shape (n,) or (..., n)
     low_bound : int, optional
         lower boundary, by default 0
     high_bound : int, optional
@@ -177,17 +259,287 @@ def norm_data(data: np.ndarray, low_bound: int = 0, high_bound: int = 1) -> np.n
     np.ndarray
         absolute and normalized data
     """
+    data = np.asarray(data)
+    data_min = np.min(data, axis=-1, keepdims=True)
+    diff_arr = np.max(data, axis=-1, keepdims=True) - data_min
+    return (((data - data_min) * (high_bound - low_bound)) / diff_arr) + low_bound
+
+
+class _PreparedArrayWriter:
+    """
+    Writes the prepared arrays of all samples into one fixed-stride .npy file per
+    array and collects the sample metadata for the sidecar table.
+
+    Parameters
+    ----------
+    spath : str
+        save path
+    n_samples : int
+        number of prepared samples
+    """
+
+    def __init__(self, spath: str, n_samples: int) -> None:
+        self.spath = spath
+        self.n_samples = n_samples
+        self.arrays = {}
+        self.metadata = []
+
+    def write(
+        self, start: int, arrays: Dict[str, np.ndarray], metadata: List[dict]
+    ) -> None:
+        """
+        Write the arrays of the samples start, start + 1, ... at once.
+        """
+        for name, array in arrays.items():
+            if name not in self.arrays:
+                # The first chunk determines dtype and shape.
+                self.arrays[name] = np.lib.format.open_memmap(
+                    f"{self.spath}{name}.npy",
+                    mode="w+",
+                    dtype=array.dtype,
+                    shape=(self.n_samples,) + array.shape[1:],
+                )
+            self.arrays[name][start : start + array.shape[0]] = array
+        for idx, sample_metadata in enumerate(metadata, start):
+            self.metadata.append({"sample": idx, **sample_metadata})
+
+    def close(self) -> None:
+        for array in self.arrays.values():
+            array.flush()
+        self.arrays = {}
+        pd.DataFrame(self.metadata).to_csv(f"{self.spath}metadata.csv", index=False)
+
+
+def load_prepared_arrays(
+    spath: str, mmap_mode: str = "r"
+) -> Tuple[Dict[str, np.ndarray], pd.DataFrame]:
+    """
+    Opens the arrays that were prepared with `mmap=True` without loading them into RAM.
 
-    norm_data = []
-    diff = high_bound - low_bound
-    diff_arr = max(data) - min(data)
-    for i in data:
-        temp = (((i - min(data)) * diff) / diff_arr) + low_bound
-        norm_data.append(temp)
-    return np.array(norm_data)
+    Parameters
+    ----------
+    spath : str
+        directory of the prepared data
+    mmap_mode : str, optional
+        memory map mode of `np.load`, by default "r"
+
+    Returns
+    -------
+    Tuple[Dict[str, np.ndarray], pd.DataFrame]
+        memory mapped arrays with the sample index as first axis, metadata table
+    """
+    metadata = pd.read_csv(f"{spath}metadata.csv")
+    arrays = {
+        fname[:-4]: np.load(spath + fname, mmap_mode=mmap_mode)
+        for fname in sorted(os.listdir(spath))
+        if fname.endswith(".npy")
+    }
+    return arrays, metadata
+
+
+def prepare_sample_chunk(
+    samples: List[dict],
+    positions: bool = False,
+    x_y_offset: float = 180,
+    tank_r_inner: float = 97.0,
+) -> Dict[str, np.ndarray]:
+    """
+    Computes the prepared quantities of several samples at once. Every quantity is
+    computed once over the whole (samples, stages, n_el) tensor of the chunk.
+
+    Parameters
+    ----------
+    samples : List[dict]
+        samples of `load_sample()` with equal number of stages and electrodes
+    positions : bool, optional
+        add the tank relative positions "r_phi" and "x_y" (normalised by the inner tank radius), by default False
+    x_y_offset : float, optional
+        Ender 5 x,y-axis offset, by default 180
+    tank_r_inner : float, optional
+        inner tank radius, by default 97.0
 
+    Returns
+    -------
+    Dict[str, np.ndarray]
+        prepared arrays with the sample index as first axis
+    """
+    potential_matrix = np.stack([extract_potentials(sample) for sample in samples])
+    excitation = np.stack([sample_excitation_stgs(sample) for sample in samples])
+    p_with_ext = extract_electrodepotentials(potential_matrix, excitation, False)
+    p_without_ext = extract_electrodepotentials(potential_matrix, excitation, True)
+    v_with_ext = compute_v(p_with_ext)
+    v_without_ext = compute_v(p_without_ext)
+    chunk = dict(
+        potential_matrix=potential_matrix,
+        p_with_ext=p_with_ext,
+        p_without_ext=p_without_ext,
+        abs_p_norm_without_ext=np.abs(norm_data(p_without_ext)),
+        v_with_ext=v_with_ext,
+        v_without_ext=v_without_ext,
+        abs_v_norm_without_ext=norm_data(v_without_ext),
+    )
+    if positions:
+        chunk["r_phi"] = np.array(
+            [comp_tank_relative_r_phi(sample) for sample in samples]
+        )
+        chunk["x_y"] = (
+            np.array(
+                [
+                    [sample["enderstat"]["abs_x_pos"], sample["enderstat"]["abs_y_pos"]]
+                    for sample in samples
+                ]
+            )
+            - x_y_offset
+        ) / tank_r_inner
+    return chunk
+
+
+def _prepare_chunk_files(
+    lpath: str,
+    spath: str,
+    start: int,
+    chunk_paths: List[str],
+    positions: bool,
+    gen_mesh: bool,
+    h0: float,
+    obj_perm: float,
+    x_y_offset: float,
+    tank_r_inner: float,
+    mmap: bool,
+) -> Tuple[int, Union[None, Dict[str, np.ndarray]], List[dict]]:
+    """
+    Prepares the samples `chunk_paths` that are numbered from `start` on.
+    The .npz files are written directly, the arrays for the memory mapped export
+    are returned to be written by the calling process.
 
-def prepare_all_samples_for_16_el_single(prep_cnf: PreperationConfig):
+    Returns
+    -------
+    Tuple[int, Union[None, Dict[str, np.ndarray]], List[dict]]
+        start, prepared arrays (only with mmap), metadata of every sample
+    """
+    samples = [load_directory_sample(lpath, sample_path) for sample_path in chunk_paths]
+    chunk = prepare_sample_chunk(samples, positions, x_y_offset, tank_r_inner)
+    x_y = chunk.pop("x_y", None)
+    configs = [vars(sample_config(sample)) for sample in samples]
+    metadata = [
+        {"source": sample_path, **config}
+        for sample_path, config in zip(chunk_paths, configs)
+    ]
+    if gen_mesh:
+        sizes = np.array([config["size"] for config in configs])
+        perm_array = mesh_template(h0=h0).circle_perm_arrays(
+            x_y[:, 0], x_y[:, 1], sizes, obj_perm
+        )
+        chunk = dict(perm_array=perm_array, **chunk)
+    if mmap:
+        return start, chunk, metadata
+    for idx, config in enumerate(configs):
+        arrays = {name: array[idx] for name, array in chunk.items()}
+        np.savez(spath + f"sample_{start + idx:06}.npz", **arrays, config=config)
+    return start, None, metadata
+
+
+def prepare_samples(
+    prep_cnf: PreperationConfig,
+    positions: bool = False,
+    gen_mesh: bool = False,
+    h0: float = 0.05,
+    obj_perm: float = 10.0,
+    x_y_offset: float = 180,
+    tank_r_inner: float = 97.0,
+    mmap: bool = False,
+    chunk_size: int = 256,
+    n_workers: int = 1,
+) -> None:
+    """
+    Batched preparation of all samples of a directory. The samples are loaded in
+    chunks of `chunk_size`, prepared with `prepare_sample_chunk()` and written
+    as a .npz file per sample or, with `mmap=True`, into one .npy file per array.
+    Every tenth sample is skipped. The output numbering only depends on the sorted
+    file names, so it is the same for every number of workers.
+    `prep_cnf.lpath` is a directory of sample files or a dataset directory of
+    `DatasetWriter`.
+
+    Parameters
+    ----------
+    prep_cnf : PreperationConfig
+        configuration dataclass
+    positions : bool, optional
+        store the tank relative object position "r_phi", by default False
+    gen_mesh : bool, optional
+        store the permittivity "perm_array" of the circle object on the empty mesh
+        `mesh_template(h0=h0)`, requires positions, by default False
+    h0 : float, optional
+        mesh element size, by default 0.05
+    obj_perm : float, optional
+        permittivity of the circle object, by default 10.0
+    x_y_offset : float, optional
+        Ender 5 x,y-axis offset, by default 180
+    tank_r_inner : float, optional
+        inner tank radius, by default 97.0
+    mmap : bool, optional
+        write one .npy file per array and a "metadata.csv" table, by default False
+    chunk_size : int, optional
+        number of samples that are prepared at once, by default 256
+    n_workers : int, optional
+        number of worker processes, 1 prepares in the calling process, by default 1
+
+    Raises
+    ------
+    ValueError
+        if gen_mesh is set without positions
+    """
+    if gen_mesh and not positions:
+        raise ValueError("gen_mesh=True requires positions=True")
+    sample_paths = list_samples(prep_cnf.lpath)
+    # Due to errors inside the ScioSpec software taking only burst_count-1 samples
+    sample_paths = [
+        sample_path
+        for ch_mod, sample_path in enumerate(sample_paths)
+        if ch_mod % 10 != 0
+    ]
+    if mmap:
+        writer = _PreparedArrayWriter(prep_cnf.spath, len(sample_paths))
+
+    starts = list(range(0, len(sample_paths), chunk_size))
+    chunks = [sample_paths[start : start + chunk_size] for start in starts]
+    worker = partial(
+        _prepare_chunk_files,
+        prep_cnf.lpath,
+        prep_cnf.spath,
+        positions=positions,
+        gen_mesh=gen_mesh,
+        h0=h0,
+        obj_perm=obj_perm,
+        x_y_offset=x_y_offset,
+        tank_r_inner=tank_r_inner,
+        mmap=mmap,
+    )
+    executor = ProcessPoolExecutor(max_workers=n_workers) if n_workers > 1 else None
+    try:
+        results = (
+            map(worker, starts, chunks)
+            if executor is None
+            else executor.map(worker, starts, chunks)
+        )
+        with tqdm(total=len(sample_paths)) as progress:
+            for start, chunk, metadata in results:
+                if mmap:
+                    writer.write(start, chunk, metadata)
+                progress.update(len(metadata))
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    if mmap:
+        writer.close()
+
+
+def prepare_all_samples_for_16_el_single(
+    prep_cnf: PreperationConfig,
+    mmap: bool = False,
+    chunk_size: int = 256,
+    n_workers: int = 1,
+):
     """
     Converts all samples inside one directory that were recorded in 16
     electrode mode and save the potential and data to a target directory.
@@ -197,37 +549,22 @@ def prepare_all_samples_for_16_el_single(prep_cnf: PreperationConfig):
     ----------
     prep_cnf : PreperationConfig
         configuration dataclass
+    mmap : bool, optional
+        instead of a .npz file per sample, write one .npy file per array with the
+        sample index as first axis and a "metadata.csv" table, by default False.
+        Load them with `load_prepared_arrays()`.
+    chunk_size : int, optional
+        number of samples that are prepared at once, by default 256
+    n_workers : int, optional
+        number of worker processes, by default 1
     """
 
     check_result = check_n_el_condition(
         prep_cnf, ch_group_to_check=[1], n_el_to_check=16
     )
 
-    sf_numbering = 0
     if check_result:
-        for ch_mod, sample_path in tqdm(enumerate(np.sort(os.listdir(prep_cnf.lpath)))):
-            if ch_mod % 10 != 0:
-                tmp_sample = np.load(prep_cnf.lpath + sample_path, allow_pickle=True)
-
-                tmp_p_mat = extract_potentials_from_sample_n_el_16(tmp_sample)
-                p_without_ext = extract_electrodepotentials(tmp_p_mat, tmp_sample, True)
-                p_with_ext = extract_electrodepotentials(tmp_p_mat, tmp_sample, False)
-
-                np.savez(
-                    prep_cnf.spath + f"sample_{sf_numbering:06}.npz",
-                    potential_matrix=tmp_p_mat,
-                    p_with_ext=p_with_ext,
-                    p_without_ext=p_without_ext,
-                    abs_p_norm_without_ext=np.abs(norm_data(p_without_ext)),
-                    v_with_ext=compute_v(p_with_ext),
-                    v_without_ext=compute_v(p_without_ext),
-                    abs_v_norm_without_ext=norm_data(compute_v(p_without_ext)),
-                    config=tmp_sample["config"].tolist().__dict__,
-                )
-                sf_numbering += 1
-            else:
-                pass
-                # Due to errors inside the ScioSpec software taking only burst_count-1 samples
+        prepare_samples(prep_cnf, mmap=mmap, chunk_size=chunk_size, n_workers=n_workers)
     else:
         print("Could not start converting.")
 
@@ -239,81 +576,51 @@ def prepare_all_samples_for_16_el(
     obj_perm: float = 10.0,
     x_y_offset: float = 180,
     tank_r_inner: float = 97.0,
+    chunk_size: int = 256,
+    n_workers: int = 1,
 ) -> None:
     """
     Converts all samples inside one directory that were recorded in 16
     electrode mode and save the potential and positional data to a target directory.
-    Furthermore a mesh is generated.
+    Furthermore the object is rasterized on a mesh, stored as "perm_array".
+    Use `mesh_template(h0=h0).to_mesh(perm_array)` to get the mesh object.
 
     Parameters
     ----------
     prep_cnf : PreperationConfig
         configuration dataclass
     gen_mesh : bool, optional
-        generate a mesh, by default True
+        store the permittivity of the object mesh, by default True
+    h0 : float, optional
+        mesh refinement, by default 0.05
     obj_perm : float, optional
         permittivity of the circle object, by default 10.0
     x_y_offset : float, optional
         Ender 5 x,y-axis offset, by default 180
     tank_r_inner : float, optional
         inner tank radius, by default 97.0
+    chunk_size : int, optional
+        number of samples that are prepared at once, by default 256
+    n_workers : int, optional
+        number of worker processes, by default 1
     """
 
     check_result = check_n_el_condition(
         prep_cnf, ch_group_to_check=[1], n_el_to_check=16
     )
 
-    if gen_mesh:
-        mesh_empty = create_empty_2d_mesh(h0=h0)
-    sf_numbering = 0
     if check_result:
-        for ch_mod, sample_path in tqdm(enumerate(np.sort(os.listdir(prep_cnf.lpath)))):
-            if ch_mod % 10 != 0:
-                tmp_sample = np.load(prep_cnf.lpath + sample_path, allow_pickle=True)
-
-                ender_stat = tmp_sample["enderstat"].tolist()
-                cnfg = tmp_sample["config"].tolist()
-                abs_x_pos = (ender_stat["abs_x_pos"] - x_y_offset) / tank_r_inner
-                abs_y_pos = (ender_stat["abs_y_pos"] - x_y_offset) / tank_r_inner
-
-                tmp_p_mat = extract_potentials_from_sample_n_el_16(tmp_sample)
-                p_without_ext = extract_electrodepotentials(tmp_p_mat, tmp_sample, True)
-                p_with_ext = extract_electrodepotentials(tmp_p_mat, tmp_sample, False)
-
-                if gen_mesh:
-                    mesh_obj = add_circle_anomaly(
-                        mesh_empty, abs_x_pos, abs_y_pos, cnfg.size, obj_perm
-                    )
-                    np.savez(
-                        prep_cnf.spath + f"sample_{sf_numbering:06}.npz",
-                        mesh=mesh_obj,
-                        potential_matrix=tmp_p_mat,
-                        p_with_ext=p_with_ext,
-                        p_without_ext=p_without_ext,
-                        abs_p_norm_without_ext=np.abs(norm_data(p_without_ext)),
-                        v_with_ext=compute_v(p_with_ext),
-                        v_without_ext=compute_v(p_without_ext),
-                        abs_v_norm_without_ext=norm_data(compute_v(p_without_ext)),
-                        r_phi=comp_tank_relative_r_phi(tmp_sample),
-                        config=tmp_sample["config"].tolist().__dict__,
-                    )
-                else:
-                    np.savez(
-                        prep_cnf.spath + f"sample_{sf_numbering:06}.npz",
-                        potential_matrix=tmp_p_mat,
-                        p_with_ext=p_with_ext,
-                        p_without_ext=p_without_ext,
-                        abs_p_norm_without_ext=np.abs(norm_data(p_without_ext)),
-                        v_with_ext=compute_v(p_with_ext),
-                        v_without_ext=compute_v(p_without_ext),
-                        abs_v_norm_without_ext=norm_data(compute_v(p_without_ext)),
-                        r_phi=comp_tank_relative_r_phi(tmp_sample),
-                        config=tmp_sample["config"].tolist().__dict__,
-                    )
-                sf_numbering += 1
-            else:
-                pass
-                # Due to errors inside the ScioSpec software taking only burst_count-1 samples
+        prepare_samples(
+            prep_cnf,
+            positions=True,
+            gen_mesh=gen_mesh,
+            h0=h0,
+            obj_perm=obj_perm,
+            x_y_offset=x_y_offset,
+            tank_r_inner=tank_r_inner,
+            chunk_size=chunk_size,
+            n_workers=n_workers,
+        )
     else:
         print("Could not start converting.")
 
@@ -321,21 +628,17 @@ def prepare_all_samples_for_16_el(
 def compute_v(p: np.ndarray) -> np.ndarray:
     """
     Computes the voltage out of the potential.
-    Therefore p[0,1,...,16] - p[1,2,...,0] is computed.
+    Therefore p[0,1,...,16] - p[1,2,...,0] is computed along the last axis.
 
     Parameters
     ----------
     p : np.ndarray
-        measured potentials
+        measured potentials with shape (n,) or (..., n)
 
     Returns
     -------
     np.ndarray
         voltage vector
     """
-    v = []
-    for i in range(len(p) - 1):
-        v.append(p[i] - p[i + 1])
-    v.append(p[len(p) - 1] - p[0])
-
-    return np.array(v)
+    p = np.asarray(p)
+    return p - np.roll(p, -1, axis=-1)
@@ -0,0 +1,298 @@
+""" Encoders of the Sciospec command frames [CT] [LE] [CD] [CT]"""
+
+import struct
+
+# Precompiled layouts of the frames, [CT] and [LE] included
+_FRAME_0 = struct.Struct(">BBB")
+_FRAME_U8 = struct.Struct(">BBBB")
+_FRAME_U8_U8 = struct.Struct(">BBBBB")
+_FRAME_U8_U8_U8 = struct.Struct(">BBBBBB")
+_FRAME_U8_U16 = struct.Struct(">BBBHB")
+_FRAME_U8_F32 = struct.Struct(">BBBfB")
+_FRAME_U8_F64 = struct.Struct(">BBBdB")
+_FRAME_U8_FREQUENCIES = struct.Struct(">BBBffHBB")
+
+# [fmin] [fmax] [fcount] [ftype] of a frequency block, also used to parse "B1 04"
+FREQUENCY_BLOCK = struct.Struct(">ffHB")
+
+# Fixed frames
+SAVE_SETTINGS = _FRAME_0.pack(0x90, 0x00, 0x90)
+SOFTWARE_RESET = _FRAME_0.pack(0xA1, 0x00, 0xA1)
+RESET_SETUP = _FRAME_U8.pack(0xB0, 0x01, 0x01, 0xB0)
+START_MEASUREMENT = _FRAME_U8.pack(0xB4, 0x01, 0x01, 0xB4)
+STOP_MEASUREMENT = _FRAME_U8.pack(0xB4, 0x01, 0x00, 0xB4)
+POWER_PLUG_DETECT = _FRAME_U8.pack(0xCC, 0x01, 0x81, 0xCC)
+GET_DEVICE_INFO = _FRAME_0.pack(0xD1, 0x00, 0xD1)
+GET_FIRMWARE_IDS = _FRAME_0.pack(0xD2, 0x00, 0xD2)
+
+# Option values of the settings
+ADC_RANGES = {1: 0x01, 5: 0x02, 10: 0x03}
+GAINS = {1: 0x00, 10: 0x01, 100: 0x02, 1_000: 0x03}
+LED_MODES = {"disable": 0x00, "enable": 0x01, "blink": 0x02}
+
+
+# B0: Set measurement setup
+
+
+def set_burst_count(burst_count: int) -> bytes:
+    """
+    "B0 03 02 [burst count] B0", the burst count is a 2 byte unsigned integer.
+
+    Parameters
+    ----------
+    burst_count : int
+        number of bursts between start and stop
+
+    Returns
+    -------
+    bytes
+        command frame
+    """
+    return _FRAME_U8_U16.pack(0xB0, 0x03, 0x02, burst_count, 0xB0)
+
+
+def set_framerate(framerate: float) -> bytes:
+    """
+    "B0 05 03 [frame rate] B0", single precision frames per second.
+
+    Parameters
+    ----------
+    framerate : float
+        bursts per second
+
+    Returns
+    -------
+    bytes
+        command frame
+    """
+    return _FRAME_U8_F32.pack(0xB0, 0x05, 0x03, framerate, 0xB0)
+
+
+def set_frequencies(fmin: float, fmax: float, fcount: int = 1, ftype: int = 0) -> bytes:
+    """
+    "B0 0C 04 [fmin] [fmax] [fcount] [ftype] B0", ftype 0: linear, 1: logarithmic.
+
+    Parameters
+    ----------
+    fmin : float
+        minimum frequency in Hz
+    fmax : float
+        maximum frequency in Hz
+    fcount : int, optional
+        number of frequencies, by default 1
+    ftype : int, optional
+        0: linear, 1: logarithmic distribution, by default 0
+
+    Returns
+    -------
+    bytes
+        command frame
+    """
+    return _FRAME_U8_FREQUENCIES.pack(0xB0, 0x0C, 0x04, fmin, fmax, fcount, ftype, 0xB0)
+
+
+def set_amplitude(amplitude: float) -> bytes:
+    """
+    "B0 09 05 [amplitude] B0", double precision excitation amplitude in ampere.
+
+    Parameters
+    ----------
+    amplitude : float
+        excitation amplitude in A
+
+    Returns
+    -------
+    bytes
+        command frame
+    """
+    return _FRAME_U8_F64.pack(0xB0, 0x09, 0x05, amplitude, 0xB0)
+
+
+def add_injection(inj_pos: int, inj_neg: int) -> bytes:
+    """
+    "B0 03 06 [inj+] [inj-] B0", appends an injection pair to the excitation sequence.
+
+    Parameters
+    ----------
+    inj_pos : int
+        electrode of the positive injection
+    inj_neg : int
+        electrode of the negative injection
+
+    Returns
+    -------
+    bytes
+        command frame
+    """
+    return _FRAME_U8_U8_U8.pack(0xB0, 0x03, 0x06, inj_pos, inj_neg, 0xB0)
+
+
+def set_single_ended(enable: bool = True) -> bytes:
+    """
+    "B0 03 08 01 [mode] B0", single ended measure mode.
+
+    Parameters
+    ----------
+    enable : bool, optional
+        single ended mode, by default True
+
+    Returns
+    -------
+    bytes
+        command frame
+    """
+    return _FRAME_U8_U8_U8.pack(0xB0, 0x03, 0x08, 0x01, int(enable), 0xB0)
+
+
+def set_gain(gain: int) -> bytes:
+    """
+    "B0 03 09 01 [gain] B0" for a gain of 1, 10, 100 or 1000.
+
+    Parameters
+    ----------
+    gain : int
+        gain of 1, 10, 100 or 1000
+
+    Returns
+    -------
+    bytes
+        command frame
+    """
+    return _FRAME_U8_U8_U8.pack(0xB0, 0x03, 0x09, 0x01, GAINS[gain], 0xB0)
+
+
+def set_excitation_switch(switch_type: int = 0x01) -> bytes:
+    """
+    "B0 02 0C [type] B0", 0x01: reed relays.
+
+    Parameters
+    ----------
+    switch_type : int, optional
+        0x01: reed relays, by default 0x01
+
+    Returns
+    -------
+    bytes
+        command frame
+    """
+    return _FRAME_U8_U8.pack(0xB0, 0x02, 0x0C, switch_type, 0xB0)
+
+
+def set_adc_range(adc_range: int) -> bytes:
+    """
+    "B0 02 0D [range] B0" for an ADC range of +/-1, +/-5 or +/-10 V.
+
+    Parameters
+    ----------
+    adc_range : int
+        ADC range +/-1, +/-5 or +/-10 V
+
+    Returns
+    -------
+    bytes
+        command frame
+    """
+    return _FRAME_U8_U8.pack(0xB0, 0x02, 0x0D, ADC_RANGES[adc_range], 0xB0)
+
+
+# B1: Get measurement setup
+
+
+def get_measurement_setup(option: int) -> bytes:
+    """
+    "B1 01 [option] B1", e.g. option 0x03 returns the frame rate.
+
+    Parameters
+    ----------
+    option : int
+        queried setting, e.g. 0x03 for the frame rate
+
+    Returns
+    -------
+    bytes
+        command frame
+    """
+    return _FRAME_U8.pack(0xB1, 0x01, option, 0xB1)
+
+
+# B2: Output configuration
+
+
+def set_output_config(option: int, enable: bool = True) -> bytes:
+    """
+    "B2 02 [option] [enable] B2", adds e.g. the timestamp (0x03) to the data frames.
+
+    Parameters
+    ----------
+    option : int
+        0x01: excitation setting, 0x02: frequency row, 0x03: timestamp
+    enable : bool, optional
+        add the field to the data frames, by default True
+
+    Returns
+    -------
+    bytes
+        command frame
+    """
+    return _FRAME_U8_U8.pack(0xB2, 0x02, option, int(enable), 0xB2)
+
+
+# B4: Start/stop measurement
+
+
+def start_stop_measurement(start: bool) -> bytes:
+    """
+    "B4 01 01 B4" starts and "B4 01 00 B4" stops the measurement.
+
+    Parameters
+    ----------
+    start : bool
+        start (true) or stop (false) the measurement
+
+    Returns
+    -------
+    bytes
+        command frame
+    """
+    return START_MEASUREMENT if start else STOP_MEASUREMENT
+
+
+# C8: LED control
+
+
+def set_led_auto_mode(led: int, enable: bool) -> bytes:
+    """
+    "C8 03 01 [led] [enable] C8" for the leds 1 to 4.
+
+    Parameters
+    ----------
+    led : int
+        [1,2,3,4] led number
+    enable : bool
+        automatic led control
+
+    Returns
+    -------
+    bytes
+        command frame
+    """
+    return _FRAME_U8_U8_U8.pack(0xC8, 0x03, 0x01, led, int(enable), 0xC8)
+
+
+def set_led_mode(led: int, mode: str) -> bytes:
+    """
+    "C8 03 02 [led] [mode] C8" with the mode "disable", "enable" or "blink".
+
+    Parameters
+    ----------
+    led : int
+        [1,2,3,4] led number
+    mode : str
+        ['enable','disable', 'blink'] mode
+
+    Returns
+    -------
+    bytes
+        command frame
+    """
+    return _FRAME_U8_U8_U8.pack(0xC8, 0x03, 0x02, led, LED_MODES[mode], 0xC8)
@@ -0,0 +1,329 @@
+""" Versioned, pickle-free format of single measurement samples (.npz)"""
+
+import os
+import json
+import dataclasses
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from tqdm import tqdm
+from typing import Dict, Union
+from . import sciopy_dataclasses
+from .sciopy_dataclasses import FrameBatch
+from .frame_decoding import single_frames_to_frame_batch
+
+SAMPLE_FORMAT_VERSION = 1
+
+# Frame arrays of a single burst, stored with their FrameBatch names
+FRAME_FIELDS = (
+    "channels",
+    "excitation_stgs",
+    "frequency_row",
+    "timestamp",
+    "channel_group",
+)
+
+
+def _json_default(obj):
+    """
+    Convert the objects json can not serialize: dataclasses to dicts, numpy arrays
+    and scalars to python values and complex numbers to [real, imag].
+    Every other object raises a TypeError instead of being stored as a string.
+    """
+    if dataclasses.is_dataclass(obj):
+        return dataclasses.asdict(obj)
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return _json_default(obj.item()) if np.iscomplexobj(obj) else obj.item()
+    if isinstance(obj, complex):
+        return [obj.real, obj.imag]
+    raise TypeError(f"{type(obj).__name__} can not be stored without pickle")
+
+
+def config_to_json(config) -> str:
+    """
+    Serialize a measurement config with its type name.
+
+    Parameters
+    ----------
+    config :
+        ScioSpecMeasurementSetup, ScioSpecMeasurementConfig or dict
+
+    Returns
+    -------
+    str
+        json string {"type": ..., "fields": {...}}
+    """
+    if isinstance(config, dict):
+        return json.dumps({"type": "dict", "fields": config}, default=_json_default)
+    # vars() also keeps attributes that were added to the instance, e.g. "size".
+    fields = vars(config)
+    return json.dumps(
+        {"type": type(config).__name__, "fields": fields}, default=_json_default
+    )
+
+
+def config_from_json(config_json: str):
+    """
+    Restore a measurement config of `config_to_json()`.
+    Fields that were added to or removed from the dataclass since the sample was
+    written do not break loading, the stored fields are restored as they are.
+
+    Parameters
+    ----------
+    config_json : str
+        json string
+
+    Returns
+    -------
+    ScioSpecMeasurementSetup, ScioSpecMeasurementConfig or dict
+        restored config, a dict if the type is unknown
+    """
+    content = json.loads(config_json)
+    cls = getattr(sciopy_dataclasses, content["type"], None)
+    if cls is None or not dataclasses.is_dataclass(cls):
+        return content["fields"]
+    config = cls.__new__(cls)
+    config.__dict__.update(content["fields"])
+    return config
+
+
+def _config_value(config, key: str):
+    """
+    Setting of a config that is a dataclass or a dict, None if it is missing.
+    """
+    if isinstance(config, dict):
+        return config.get(key)
+    return getattr(config, key, None)
+
+
+def sample_config(sample):
+    """
+    Config of a sample of `load_sample()` or of a sample file opened with `np.load()`.
+
+    Parameters
+    ----------
+    sample :
+        loaded sample
+
+    Returns
+    -------
+    ScioSpecMeasurementSetup, ScioSpecMeasurementConfig or dict
+        measurement config
+    """
+    if "config_json" in sample:
+        # pickle-free sample file opened with np.load()
+        return config_from_json(str(sample["config_json"]))
+    config = sample["config"]
+    if isinstance(config, np.ndarray):
+        return config.tolist()
+    return config
+
+
+def save_sample(
+    fname: str,
+    batch: FrameBatch,
+    config,
+    metadata: Union[None, dict] = None,
+    burst: int = 0,
+) -> None:
+    """
+    Save one burst as a sample file that can be loaded without pickle.
+    An existing metadata index of the directory (see `load_index()`) is updated
+    with the new sample.
+
+    Parameters
+    ----------
+    fname : str
+        file name, e.g. "sample_000000.npz"
+    batch : FrameBatch
+        measured bursts
+    config :
+        measurement config, e.g. ScioSpecMeasurementSetup
+    metadata : Union[None, dict], optional
+        json serializable sample information, e.g. {"enderstat": {...}}, by default None
+    burst : int, optional
+        burst of the batch, by default 0
+    """
+    if not fname.endswith(".npz"):
+        fname += ".npz"
+    np.savez(
+        fname,
+        format_version=np.array(SAMPLE_FORMAT_VERSION),
+        config_json=np.array(config_to_json(config)),
+        metadata_json=np.array(json.dumps(metadata or {}, default=_json_default)),
+        **{name: getattr(batch, name)[burst] for name in FRAME_FIELDS},
+    )
+    # sample_index imports this module
+    from .sample_index import index_path, update_index
+
+    lpath = os.path.dirname(os.path.abspath(fname))
+    if os.path.exists(index_path(lpath)):
+        update_index(lpath, [fname])
+
+
+def is_legacy_sample(fname: str) -> bool:
+    """
+    Check whether a sample file was written with pickled objects.
+
+    Parameters
+    ----------
+    fname : str
+        file name
+
+    Returns
+    -------
+    bool
+        true if the file has no format version
+    """
+    with np.load(fname) as sample:
+        return "format_version" not in sample.files
+
+
+def _load_legacy_sample(legacy: np.lib.npyio.NpzFile) -> dict:
+    sample = {"format_version": 0}
+    for key in legacy.files:
+        value = legacy[key]
+        if key == "data":
+            batch = single_frames_to_frame_batch(value.tolist())
+            sample.update({name: getattr(batch, name)[0] for name in FRAME_FIELDS})
+        elif value.dtype == object:
+            sample[key] = value.tolist()
+        else:
+            sample[key] = value
+    return sample
+
+
+def load_sample(fname: str) -> dict:
+    """
+    Load a sample file of `save_sample()`. Files with pickled "config" and "data"
+    are converted on the fly, which requires unpickling them.
+
+    Parameters
+    ----------
+    fname : str
+        file name
+
+    Returns
+    -------
+    dict
+        "format_version", "config", the frame arrays of FrameBatch
+        ("channels" with shape (stages, 16 * channel groups), ...), and the metadata entries
+    """
+    with np.load(fname) as stored:
+        if "format_version" not in stored.files:
+            # Unpickle the members of the legacy file without opening it again.
+            stored.allow_pickle = True
+            return _load_legacy_sample(stored)
+        version = int(stored["format_version"])
+        if version > SAMPLE_FORMAT_VERSION:
+            raise ValueError(f"Sample format version {version} is not supported")
+        sample = {
+            "format_version": version,
+            "config": config_from_json(str(stored["config_json"])),
+        }
+        sample.update(json.loads(str(stored["metadata_json"])))
+        for key in stored.files:
+            if key not in ("format_version", "config_json", "metadata_json"):
+                sample[key] = stored[key]
+    return sample
+
+
+def migrate_sample(fname: str, s_fname: str) -> None:
+    """
+    Convert a pickled sample file to the pickle-free format.
+    Other numeric arrays of the file are kept, other objects (e.g. "enderstat")
+    are stored as metadata.
+
+    Parameters
+    ----------
+    fname : str
+        pickled sample file
+    s_fname : str
+        new sample file, may be `fname` to convert the file in place
+    """
+    with np.load(fname, allow_pickle=True) as legacy:
+        sample = _load_legacy_sample(legacy)
+    del sample["format_version"]
+    config = sample.pop("config", {})
+    arrays = {}
+    metadata = {}
+    for key, value in sample.items():
+        if isinstance(value, np.ndarray):
+            arrays[key] = value
+        else:
+            metadata[key] = value
+    # Written next to the target and renamed, so migrating in place never leaves
+    # a truncated sample behind.
+    if not s_fname.endswith(".npz"):
+        s_fname += ".npz"
+    tmp_fname = f"{s_fname[:-4]}.tmp.npz"
+    try:
+        np.savez(
+            tmp_fname,
+            format_version=np.array(SAMPLE_FORMAT_VERSION),
+            config_json=np.array(config_to_json(config)),
+            metadata_json=np.array(json.dumps(metadata, default=_json_default)),
+            **arrays,
+        )
+        os.replace(tmp_fname, s_fname)
+    except BaseException:
+        if os.path.exists(tmp_fname):
+            os.remove(tmp_fname)
+        raise
+
+
+def _migrate_single_sample(fname: str, s_fname: str) -> Union[None, str]:
+    try:
+        if is_legacy_sample(fname):
+            migrate_sample(fname, s_fname)
+        elif os.path.abspath(fname) != os.path.abspath(s_fname):
+            with open(fname, "rb") as src, open(s_fname, "wb") as dst:
+                dst.write(src.read())
+    except Exception as err:
+        return f"{type(err).__name__}: {err}"
+
+
+def migrate_sample_directory(
+    lpath: str, spath: str, n_workers: int = 1, chunksize: int = 16
+) -> Dict[str, str]:
+    """
+    Converts all pickled .npz samples of lpath to the pickle-free format in spath.
+    Samples that are already converted are copied. lpath and spath may be equal.
+
+    Parameters
+    ----------
+    lpath : str
+        load path
+    spath : str
+        save path
+    n_workers : int, optional
+        number of worker processes, by default 1
+    chunksize : int, optional
+        number of files per submitted task, by default 16
+
+    Returns
+    -------
+    Dict[str, str]
+        error message of every file that could not be converted
+    """
+    os.makedirs(spath, exist_ok=True)
+    objects = sorted(obj for obj in os.listdir(lpath) if obj.endswith(".npz"))
+    args = ([lpath + obj for obj in objects], [spath + obj for obj in objects])
+    errors = {}
+    executor = ProcessPoolExecutor(max_workers=n_workers) if n_workers > 1 else None
+    try:
+        if executor is None:
+            results = map(_migrate_single_sample, *args)
+        else:
+            results = executor.map(_migrate_single_sample, *args, chunksize=chunksize)
+        for obj, error in tqdm(zip(objects, results), total=len(objects)):
+            if error is not None:
+                errors[obj] = error
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    print(f"\t Migrated {len(objects) - len(errors)} of {len(objects)} files.")
+    for obj, error in errors.items():
+        print(f"\t Failed: {obj} -> {error}")
+    return errors
@@ -0,0 +1,280 @@
+""" SQLite metadata index of the samples of a measurement directory"""
+
+import os
+import json
+import sqlite3
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+from typing import List, Union
+from .sample_format import (
+    _config_value,
+    config_from_json,
+    config_to_json,
+    sample_config,
+)
+from .dataset import META_FILE, SAMPLE_NAME, _read_header, is_dataset, open_dataset
+from .prepare_data import comp_tank_relative_r_phi
+
+# Increase if the columns or their extraction change, the index is rebuilt then.
+INDEX_VERSION = 1
+
+INDEX_COLUMNS = (
+    "fname",
+    "size",
+    "mtime_ns",
+    "kind",
+    "n_el",
+    "channel_group",
+    "burst_count",
+    "n_frames",
+    "temperature",
+    "datetime",
+    "abs_x_pos",
+    "abs_y_pos",
+    "abs_z_pos",
+    "r",
+    "phi",
+    "config_json",
+    "enderstat_json",
+)
+
+
+def index_path(lpath: str) -> str:
+    """
+    Path of the index of a measurement directory, stored next to the directory.
+
+    Parameters
+    ----------
+    lpath : str
+        measurement directory, e.g. "measurement_16/"
+
+    Returns
+    -------
+    str
+        path of the SQLite file
+    """
+    return f"{os.path.normpath(lpath)}_index.sqlite"
+
+
+def _connect(lpath: str) -> sqlite3.Connection:
+    con = sqlite3.connect(index_path(lpath))
+    if con.execute("PRAGMA user_version").fetchone()[0] != INDEX_VERSION:
+        con.execute("DROP TABLE IF EXISTS samples")
+        con.execute(f"PRAGMA user_version = {INDEX_VERSION}")
+    con.execute(
+        "CREATE TABLE IF NOT EXISTS samples ("
+        "fname TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, kind TEXT, "
+        "n_el INTEGER, channel_group TEXT, burst_count INTEGER, n_frames INTEGER, "
+        "temperature REAL, datetime TEXT, abs_x_pos REAL, abs_y_pos REAL, "
+        "abs_z_pos REAL, r REAL, phi REAL, config_json TEXT, enderstat_json TEXT)"
+    )
+    return con
+
+
+def _member_length(sample: np.lib.npyio.NpzFile, key: str) -> int:
+    """
+    Length of an array member, read from its .npy header without loading the data.
+    """
+    with sample.zip.open(f"{key}.npy") as file:
+        version = np.lib.format.read_magic(file)
+        if version == (1, 0):
+            shape = np.lib.format.read_array_header_1_0(file)[0]
+        elif version == (2, 0):
+            shape = np.lib.format.read_array_header_2_0(file)[0]
+        else:
+            shape = sample[key].shape
+    return shape[0] if len(shape) else 1
+
+
+def sample_metadata(fname: str) -> dict:
+    """
+    Reads the metadata of a pickled or pickle-free sample file. Only "config",
+    "enderstat" and "r_phi" are loaded, the frames are not.
+
+    Parameters
+    ----------
+    fname : str
+        sample file
+
+    Returns
+    -------
+    dict
+        index row without "fname", "size" and "mtime_ns"
+    """
+    with np.load(fname) as sample:
+        files = sample.files
+        if "format_version" not in files:
+            # Only the members of legacy files are pickled.
+            sample.allow_pickle = True
+        config = None
+        if "config" in files or "config_json" in files:
+            config = sample_config(sample)
+        enderstat = None
+        if "metadata_json" in files:
+            enderstat = json.loads(str(sample["metadata_json"])).get("enderstat")
+        elif "enderstat" in files:
+            enderstat = sample["enderstat"].tolist()
+
+        kind = "prepared" if "potential_matrix" in files else "raw"
+        n_frames = None
+        for key in ("data", "channels", "potential_matrix"):
+            if key in files:
+                n_frames = _member_length(sample, key)
+                break
+
+        r_phi = sample["r_phi"] if "r_phi" in files else None
+    return _metadata_row(config, enderstat, kind, n_frames, r_phi)
+
+
+def _metadata_row(config, enderstat, kind: str, n_frames, r_phi) -> dict:
+    """
+    Index row of a sample without "fname", "size" and "mtime_ns".
+    The position is computed of the enderstat if r_phi was not stored.
+    """
+    r = phi = None
+    if r_phi is not None:
+        r, phi = (float(value) for value in r_phi)
+    elif enderstat is not None:
+        r, phi = (
+            float(value) for value in comp_tank_relative_r_phi({"enderstat": enderstat})
+        )
+    channel_group = _config_value(config, "channel_group")
+    enderstat = enderstat or {}
+    return {
+        "kind": kind,
+        "n_el": _config_value(config, "n_el"),
+        "channel_group": None if channel_group is None else json.dumps(channel_group),
+        "burst_count": _config_value(config, "burst_count"),
+        "n_frames": n_frames,
+        "temperature": _config_value(config, "temperature"),
+        "datetime": _config_value(config, "datetime"),
+        "abs_x_pos": enderstat.get("abs_x_pos"),
+        "abs_y_pos": enderstat.get("abs_y_pos"),
+        "abs_z_pos": enderstat.get("abs_z_pos"),
+        "r": r,
+        "phi": phi,
+        "config_json": None if config is None else config_to_json(config),
+        "enderstat_json": json.dumps(enderstat) if enderstat else None,
+    }
+
+
+def update_index(lpath: str, fnames: Union[None, List[str]] = None) -> str:
+    """
+    Creates or updates the metadata index of a measurement directory. Only new or
+    changed samples (size or modification time) are read, removed samples are
+    dropped from the index.
+
+    Parameters
+    ----------
+    lpath : str
+        measurement directory
+    fnames : Union[None, List[str]], optional
+        only (re)index these appended files instead of scanning the directory, by default None
+
+    Returns
+    -------
+    str
+        path of the index
+    """
+    if is_dataset(lpath):
+        # The metadata file of a dataset is appended with every sample.
+        return os.path.join(lpath, META_FILE)
+    con = _connect(lpath)
+    try:
+        indexed = {
+            fname: (size, mtime_ns)
+            for fname, size, mtime_ns in con.execute(
+                "SELECT fname, size, mtime_ns FROM samples"
+            )
+        }
+        if fnames is None:
+            stats = {
+                entry.name: entry.stat()
+                for entry in os.scandir(lpath)
+                if entry.is_file() and entry.name.endswith(".npz")
+            }
+            removed = indexed.keys() - stats.keys()
+            con.executemany(
+                "DELETE FROM samples WHERE fname = ?", [(fname,) for fname in removed]
+            )
+        else:
+            names = [os.path.basename(fname) for fname in fnames]
+            stats = {name: os.stat(os.path.join(lpath, name)) for name in names}
+
+        changed = []
+        for fname, stat in sorted(stats.items()):
+            if indexed.get(fname) != (stat.st_size, stat.st_mtime_ns):
+                changed.append((fname, stat.st_size, stat.st_mtime_ns))
+
+        rows = []
+        for fname, size, mtime_ns in tqdm(changed, disable=len(changed) < 100):
+            row = {"fname": fname, "size": size, "mtime_ns": mtime_ns}
+            row.update(sample_metadata(os.path.join(lpath, fname)))
+            rows.append(tuple(row[col] for col in INDEX_COLUMNS))
+        con.executemany(
+            f"INSERT OR REPLACE INTO samples VALUES ({', '.join('?' * len(INDEX_COLUMNS))})",
+            rows,
+        )
+        con.commit()
+    finally:
+        con.close()
+    return index_path(lpath)
+
+
+def load_index(lpath: str, update: bool = True) -> pd.DataFrame:
+    """
+    Metadata of all samples of a measurement directory, sorted by file name.
+    A dataset directory of `DatasetWriter` needs no index file, the metadata that
+    is written with every sample is read directly.
+
+    Parameters
+    ----------
+    lpath : str
+        measurement directory
+    update : bool, optional
+        update the index before reading it, by default True
+
+    Returns
+    -------
+    pd.DataFrame
+        one row per sample with the columns `INDEX_COLUMNS`
+    """
+    if is_dataset(lpath):
+        return _dataset_index(lpath)
+    if update or not os.path.exists(index_path(lpath)):
+        update_index(lpath)
+    con = _connect(lpath)
+    try:
+        return pd.read_sql_query("SELECT * FROM samples ORDER BY fname", con)
+    finally:
+        con.close()
+
+
+def _dataset_index(lpath: str) -> pd.DataFrame:
+    """
+    Index table of a dataset directory, "fname" is the name of `list_samples()`.
+    """
+    header = _read_header(lpath)
+    if header is None:
+        return pd.DataFrame(columns=INDEX_COLUMNS)
+    shape = header["fields"].get("channels", {}).get("shape")
+    n_frames = shape[0] if shape else None
+    rows = []
+    for idx, metadata in enumerate(open_dataset(lpath).metadata):
+        if "config_json" in metadata:
+            config = config_from_json(metadata["config_json"])
+        else:
+            config = metadata.get("config")
+        row = {"fname": SAMPLE_NAME.format(idx), "size": None, "mtime_ns": None}
+        row.update(
+            _metadata_row(
+                config,
+                metadata.get("enderstat"),
+                "raw",
+                n_frames,
+                metadata.get("r_phi"),
+            )
+        )
+        rows.append(row)
+    return pd.DataFrame(rows, columns=INDEX_COLUMNS)
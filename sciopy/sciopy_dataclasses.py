@@ -1,5 +1,6 @@
 from dataclasses import dataclass
 from typing import List, Tuple, Union
+import numpy as np
 
 
 @dataclass
@@ -95,6 +96,104 @@ class SingleFrame:
     end_tag: str
 
 
+@dataclass
+class FrameBatch:
+    """
+    Columnar storage of the parsed frames of one or more bursts.
+    The frames of all channel groups of one excitation stage are merged into one row.
+
+    Parameters
+    ----------
+    channels : np.ndarray
+        complex64 channel values, shape (bursts, stages, 16 * channel groups)
+    excitation_stgs : np.ndarray
+        excitation setting [ESout, ESin], shape (bursts, stages, 2)
+    frequency_row : np.ndarray
+        frequency row, shape (bursts, stages)
+    timestamp : np.ndarray
+        milli seconds, shape (bursts, stages, channel groups)
+    channel_group : np.ndarray
+        channel group of every merged frame, shape (bursts, stages, channel groups)
+    """
+
+    channels: np.ndarray
+    excitation_stgs: np.ndarray
+    frequency_row: np.ndarray
+    timestamp: np.ndarray
+    channel_group: np.ndarray
+
+    def __len__(self) -> int:
+        return self.channels.shape[0]
+
+    def single_frames(self, burst: int) -> List[SingleFrame]:
+        """
+        Materialize the frames of a single burst as SingleFrame objects.
+
+        Parameters
+        ----------
+        burst : int
+            burst index
+
+        Returns
+        -------
+        List[SingleFrame]
+            frames ordered by excitation stage and channel group
+        """
+        frames = []
+        for stage in range(self.channels.shape[1]):
+            fr = int(self.frequency_row[burst, stage])
+            for grp in range(self.channel_group.shape[2]):
+                values = self.channels[burst, stage, grp * 16 : (grp + 1) * 16]
+                channels = {f"ch_{ch+1}": complex(val) for ch, val in enumerate(values)}
+                frames.append(
+                    SingleFrame(
+                        start_tag="b4",
+                        channel_group=int(self.channel_group[burst, stage, grp]),
+                        excitation_stgs=self.excitation_stgs[burst, stage].astype(int),
+                        frequency_row=np.array([f"{fr >> 8:x}", f"{fr & 0xFF:x}"]),
+                        timestamp=int(self.timestamp[burst, stage, grp]),
+                        **channels,
+                        end_tag="b4",
+                    )
+                )
+        return frames
+
+
+@dataclass
+class DeviceSetup:
+    """
+    Measurement setup read back from the device.
+
+    Parameters
+    ----------
+    burst_count : int
+        number of measurements between start and stop command
+    frame_rate : float
+        measurements per second
+    frequencies : List[Tuple[float, float, int, int]]
+        frequency blocks (fmin, fmax, fcount, ftype)
+    amplitude : float
+        excitation amplitude in ampere
+    excitation_sequence : List[Tuple[int, int]]
+        injection pairs [inj+, inj-]
+    measure_mode : List[int]
+        [Mode] [Boundary]
+    gain : List[int]
+        [Mode] [Data]
+    excitation_switch : int
+        excitation switch type
+    """
+
+    burst_count: int
+    frame_rate: float
+    frequencies: List[Tuple[float, float, int, int]]
+    amplitude: float
+    excitation_sequence: List[Tuple[int, int]]
+    measure_mode: List[int]
+    gain: List[int]
+    excitation_switch: int
+
+
 @dataclass
 class ScioSpecMeasurementConfig:
     """
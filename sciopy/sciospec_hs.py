@@ -3,17 +3,22 @@ try:
 except ImportError:
     print("Could not import module: serial")
 
-from sciopy import (
-    StartStopMeasurement_usb_hs,
+from .usb_hs_handling import StartStopMeasurement_usb_hs
+from .setup_m import (
     del_hex_in_list,
     reshape_full_message_in_bursts,
     split_bursts_in_frames,
 )
+from .frame_decoding import decode_frame_batch
+from .sciopy_dataclasses import ScioSpecMeasurementSetup
 
-from sciopy.sciopy_dataclasses import ScioSpecMeasurementSetup
 
-
-def sciospec_measurement(COM_Sciospec, ssms: ScioSpecMeasurementSetup) -> None:
+def sciospec_measurement(
+    COM_Sciospec, ssms: ScioSpecMeasurementSetup, frame_batch: bool = False
+) -> None:
+    if frame_batch:
+        measurement_data = StartStopMeasurement_usb_hs(COM_Sciospec, raw=True)
+        return decode_frame_batch(measurement_data, ssms)
     measurement_data_hex = StartStopMeasurement_usb_hs(COM_Sciospec)
     measurement_data = del_hex_in_list(measurement_data_hex)
     split_measurement_data = reshape_full_message_in_bursts(measurement_data, ssms)
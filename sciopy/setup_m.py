@@ -1,10 +1,23 @@
 # TBD: https://stackoverflow.com/questions/3898572/what-are-the-most-common-python-docstring-formats
 
 import struct
+import weakref
 from typing import Union, List
-from .sciopy_dataclasses import SingleFrame, ScioSpecMeasurementConfig
+from .sciopy_dataclasses import SingleFrame, ScioSpecMeasurementConfig, DeviceSetup
+from .command_layer import send_command, send_commands
+from . import protocol
 import numpy as np
 
+# [CT] 01 [OB] [CT] queries of the measurement setup, see `GetMeasurementSetup()`
+DEVICE_SETUP_QUERIES = [
+    protocol.get_measurement_setup(option)
+    for option in [0x02, 0x03, 0x04, 0x05, 0x06, 0x08, 0x09, 0x0C]
+]
+# Last read back setup of each serial connection
+_device_setups = weakref.WeakKeyDictionary()
+# Last ScioSpecMeasurementSetup written by `set_measurement_config()` to each serial connection
+_applied_setups = weakref.WeakKeyDictionary()
+
 
 def SystemMessageCallback(
     serial, prnt_msg: bool = True, ret_hex_int: Union[None, str] = None
@@ -91,8 +104,7 @@ def SaveSettings(serial) -> None:
     -------
     None
     """
-    serial.write(bytearray([0x90, 0x00, 0x90]))
-    SystemMessageCallback(serial)
+    send_command(serial, protocol.SAVE_SETTINGS, prnt_msg=True)
 
 
 def SoftwareReset(serial) -> None:
@@ -108,7 +120,8 @@ def SoftwareReset(serial) -> None:
     -------
     None
     """
-    serial.write(bytearray([0xA1, 0x00, 0xA1]))
+    invalidate_device_setup(serial)
+    serial.write(protocol.SOFTWARE_RESET)
     SystemMessageCallback(serial)
 
 
@@ -125,8 +138,8 @@ def ResetMeasurementSetup(serial):
     -------
     None
     """
-    serial.write(bytearray([0xB0, 0x01, 0x01, 0xB0]))
-    SystemMessageCallback(serial)
+    invalidate_device_setup(serial)
+    send_command(serial, protocol.RESET_SETUP, prnt_msg=True)
 
 
 def SetMeasurementSetup(
@@ -188,94 +201,128 @@ def SetMeasurementSetup(
     None
     """
 
+    invalidate_device_setup(serial)
+
     def write_part(serial, msg) -> None:
         serial.write(msg)
         SystemMessageCallback(serial)
 
     if burst_count <= 255:
-        burst_count = bytearray([0xB0, 0x03, 0x02, 0x00, burst_count, 0xB0])
-        write_part(serial, burst_count)
+        write_part(serial, protocol.set_burst_count(burst_count))
 
-    frame_rate = bytearray([0xB0, 0x05, 0x03, frame_rate, 0xB0])
-    write_part(serial, frame_rate)
+    write_part(serial, protocol.set_framerate(frame_rate))
 
-    exc_freq = bytearray(
-        [
-            0xB0,
-            0x0C,
-            0x04,
-            exc_freq[0],
-            exc_freq[1],
-            exc_freq[2],
-            exc_freq[3],
-            0xB0,
-        ]
-    )
-    write_part(serial, exc_freq)
+    write_part(serial, protocol.set_frequencies(*exc_freq))
 
-    # exc_amp = bytearray([0xB0, 0x05, 0x05, exc_amp, 0xB0])
-    # write_part(serial, exc_amp)
+    # write_part(serial, protocol.set_amplitude(exc_amp))
 
     print("Setup done")
 
 
-def GetMeasurementSetup(serial) -> None:
+def parse_device_setup(responses: List[list]) -> DeviceSetup:
     """
-    Print information about the current configuration.
-    ->!!! TBD !!!<-
+    Parse the returned frames of the `DEVICE_SETUP_QUERIES`.
+
+    Parameters
+    ----------
+    responses : List[list]
+        returned frames (command tag, data bytes) of every query
+
+    Returns
+    -------
+    DeviceSetup
+        parsed measurement setup
+    """
+    data = {}
+    for response in responses:
+        for tag, payload in response:
+            if tag == 0xB1 and len(payload) > 0:
+                data[payload[0]] = payload[1:]
+
+    freq = data.get(0x04, b"")
+    frequencies = [
+        protocol.FREQUENCY_BLOCK.unpack_from(freq, i)
+        for i in range(
+            0,
+            len(freq) - protocol.FREQUENCY_BLOCK.size + 1,
+            protocol.FREQUENCY_BLOCK.size,
+        )
+    ]
+    exc_seq = data.get(0x06, b"")
+    return DeviceSetup(
+        burst_count=int.from_bytes(data.get(0x02, b""), "big"),
+        frame_rate=struct.unpack(">f", data[0x03])[0] if 0x03 in data else None,
+        frequencies=frequencies,
+        amplitude=struct.unpack(">d", data[0x05])[0] if 0x05 in data else None,
+        excitation_sequence=list(zip(exc_seq[::2], exc_seq[1::2])),
+        measure_mode=list(data.get(0x08, b"")),
+        gain=list(data.get(0x09, b"")),
+        excitation_switch=data[0x0C][0] if 0x0C in data else None,
+    )
+
+
+def read_device_setup(serial, use_cache: bool = True) -> DeviceSetup:
+    """
+    Read back the measurement setup with a single pipelined query batch.
+    The result is cached per serial connection until a setter is called.
 
     Parameters
     ----------
     serial :
         serial connection
+    use_cache : bool, optional
+        return the cached setup if available, by default True
 
     Returns
     -------
-    None
+    DeviceSetup
+        current measurement setup of the device
     """
-    burst_count = bytearray([0xB1, 0x01, 0x02, 0xB1])
-    serial.write(burst_count)
-    print("Burst Count:")
-    SystemMessageCallback(serial)  # [CT] 03 02 [burst count] [CT]
-
-    frame_rate = bytearray([0xB1, 0x01, 0x03, 0xB1])
-    serial.write(frame_rate)
-    print("Frame Rate:")
-    SystemMessageCallback(serial)  # [CT] 05 03 [frame rate] [CT]
-
-    exc_freq = bytearray([0xB1, 0x01, 0x04, 0xB1])
-    serial.write(exc_freq)
-    print("Excitation Frequencies:")
-    SystemMessageCallback(
-        serial
-    )  # [CT] [LE] 04 [fmin 1st block] [fmax 1st block] [fcount 1st block] [ftype 1st block] [fmin 2nd block] [fmax 2nd block] [fcount 2nd block] [ftype 2nd block] ... [CT]
-
-    exc_amp = bytearray(
-        [0xB1, 0x01, 0x05, 0xB1]
-    )  # [CT] 05 05 [excitation amplitude] [CT]
-    serial.write(exc_amp)
-    print("Excitation Amplitude:")
-    SystemMessageCallback(serial)
+    if use_cache and serial in _device_setups:
+        return _device_setups[serial]
+    setup = parse_device_setup(send_commands(serial, DEVICE_SETUP_QUERIES))
+    _device_setups[serial] = setup
+    return setup
 
-    exc_seq = bytearray([0xB1, 0x01, 0x06, 0xB1])
-    serial.write(exc_seq)
-    print("Excitation Sequence:")
-    SystemMessageCallback(serial)  # [CT] [LE] 06 [excitation sequence] [CT]
 
-    meas_mode = bytearray([0xB1, 0x01, 0x08, 0xB1])
-    serial.write(meas_mode)
-    print("Measure Mode:")
-    SystemMessageCallback(serial)  # [CT] 03 08 [Mode] [Boundary] [CT]
+def invalidate_device_setup(serial) -> None:
+    """
+    Drop the cached measurement setup of a serial connection.
+    The last applied setup is forgotten as well, so the next configuration is sent in full.
 
-    gain = bytearray([0xB1, 0x01, 0x09, 0xB1])
-    serial.write(gain)
-    print("Gain Settings:")
-    SystemMessageCallback(serial)  # [CT] [LE] 09 [Mode] [Data] [CT]
+    Parameters
+    ----------
+    serial :
+        serial connection
+    """
+    _device_setups.pop(serial, None)
+    _applied_setups.pop(serial, None)
 
-    exc_switch = bytearray([0xB1, 0x01, 0x0C, 0xB1])
-    serial.write(exc_switch)
-    print("Excitation switch type:")
-    SystemMessageCallback(serial)  # [CT] 02 0C [Type] [CT]
+
+def GetMeasurementSetup(serial) -> DeviceSetup:
+    """
+    Print information about the current configuration.
+
+    Parameters
+    ----------
+    serial :
+        serial connection
+
+    Returns
+    -------
+    DeviceSetup
+        current measurement setup of the device
+    """
+    setup = read_device_setup(serial)
+    print("Burst Count:", setup.burst_count)
+    print("Frame Rate:", setup.frame_rate)
+    print("Excitation Frequencies:", setup.frequencies)
+    print("Excitation Amplitude:", setup.amplitude)
+    print("Excitation Sequence:", setup.excitation_sequence)
+    print("Measure Mode:", setup.measure_mode)
+    print("Gain Settings:", setup.gain)
+    print("Excitation switch type:", setup.excitation_switch)
+    return setup
 
 
 def SetBurstCount(serial, cnf: ScioSpecMeasurementConfig) -> None:
@@ -293,9 +340,9 @@ def SetBurstCount(serial, cnf: ScioSpecMeasurementConfig) -> None:
     -------
     None
     """
-    serial.write(bytearray([0xB0, 0x03, 0x02, 0x00, hex(cnf.burst_count), 0xB0]))
     print(f"Set burst count to {cnf.burst_count}.")
-    SystemMessageCallback(serial)
+    invalidate_device_setup(serial)
+    send_command(serial, protocol.set_burst_count(cnf.burst_count), prnt_msg=True)
 
 
 def StartStopMeasurement(serial) -> list:
@@ -313,12 +360,12 @@ def StartStopMeasurement(serial) -> list:
         message buffer
     """
     print("Starting measurement.")
-    serial.write(bytearray([0xB4, 0x01, 0x01, 0xB4]))
+    serial.write(protocol.START_MEASUREMENT)
     measurement_data_hex = SystemMessageCallback(
         serial, prnt_msg=False, ret_hex_int="hex"
     )
     print("Stopping measurement.")
-    serial.write(bytearray([0xB4, 0x01, 0x00, 0xB4]))
+    serial.write(protocol.STOP_MEASUREMENT)
     SystemMessageCallback(serial, prnt_msg=False, ret_hex_int="int")
     return measurement_data_hex
 
@@ -676,15 +723,16 @@ def SetLEDControl(serial, led: int, mode: str) -> None:
     Returns
     -------
     None
-    """
-    if mode == "disable":
-        MODE = 0x00
-    elif mode == "enable":
-        MODE = 0x01
 
-    byte_arr = bytearray([0xC8, 0x03, 0x01, led, MODE, 0xC8])
-    serial.write(byte_arr)
-    SystemMessageCallback(serial)
+    Raises
+    ------
+    ValueError
+        if the mode is neither "enable" nor "disable"
+    """
+    if mode not in ("enable", "disable"):
+        raise ValueError(f"Unknown LED auto mode {mode!r}, use 'enable' or 'disable'")
+    byte_arr = protocol.set_led_auto_mode(led, mode == "enable")
+    send_command(serial, byte_arr, prnt_msg=True)
 
 
 def GetLEDControl(serial, led: int, mode: str) -> None:
@@ -704,17 +752,9 @@ def GetLEDControl(serial, led: int, mode: str) -> None:
     -------
     None
     """
-    if mode == "disable":
-        MODE = 0x00
-    elif mode == "enable":
-        MODE = 0x01
-    elif mode == "blink":
-        MODE = 0x02
-
-    byte_arr = bytearray([0xC8, 0x03, 0x02, led, MODE, 0xC8])
+    byte_arr = protocol.set_led_mode(led, mode)
     print("sent:", byte_arr)
-    serial.write(byte_arr)
-    SystemMessageCallback(serial)
+    send_command(serial, byte_arr, prnt_msg=True)
 
 
 def SetLED_Mode(serial, led: int, mode: str) -> None:
@@ -735,16 +775,8 @@ def SetLED_Mode(serial, led: int, mode: str) -> None:
     None
     """
     # Disable automode
-    serial.write(bytearray([0xC8, 0x03, 0x01, led, 0x00, 0xC8]))
-    SystemMessageCallback(serial)
-    if mode == "disable":
-        MODE = 0x00
-    elif mode == "enable":
-        MODE = 0x01
-    elif mode == "blink":
-        MODE = 0x02
-    serial.write(bytearray([0xC8, 0x03, 0x02, led, MODE, 0xC8]))
-    SystemMessageCallback(serial)
+    send_command(serial, protocol.set_led_auto_mode(led, False), prnt_msg=True)
+    send_command(serial, protocol.set_led_mode(led, mode), prnt_msg=True)
 
 
 def DisableLED_AutoMode(serial) -> None:
@@ -760,14 +792,8 @@ def DisableLED_AutoMode(serial) -> None:
     -------
     None
     """
-    serial.write(bytearray([0xC8, 0x03, 0x01, 0x01, 0x00, 0xC8]))
-    SystemMessageCallback(serial)
-    serial.write(bytearray([0xC8, 0x03, 0x01, 0x02, 0x00, 0xC8]))
-    SystemMessageCallback(serial)
-    serial.write(bytearray([0xC8, 0x03, 0x01, 0x03, 0x00, 0xC8]))
-    SystemMessageCallback(serial)
-    serial.write(bytearray([0xC8, 0x03, 0x01, 0x04, 0x00, 0xC8]))
-    SystemMessageCallback(serial)
+    for led in [1, 2, 3, 4]:
+        send_command(serial, protocol.set_led_auto_mode(led, False), prnt_msg=True)
 
 
 def EnableLED_AutoMode(serial) -> None:
@@ -783,14 +809,8 @@ def EnableLED_AutoMode(serial) -> None:
     -------
     None
     """
-    serial.write(bytearray([0xC8, 0x03, 0x01, 0x01, 0x01, 0xC8]))
-    SystemMessageCallback(serial)
-    serial.write(bytearray([0xC8, 0x03, 0x01, 0x02, 0x01, 0xC8]))
-    SystemMessageCallback(serial)
-    serial.write(bytearray([0xC8, 0x03, 0x01, 0x03, 0x01, 0xC8]))
-    SystemMessageCallback(serial)
-    serial.write(bytearray([0xC8, 0x03, 0x01, 0x04, 0x01, 0xC8]))
-    SystemMessageCallback(serial)
+    for led in [1, 2, 3, 4]:
+        send_command(serial, protocol.set_led_auto_mode(led, True), prnt_msg=True)
 
 
 def PowerPlugDetect(serial) -> None:
@@ -806,8 +826,7 @@ def PowerPlugDetect(serial) -> None:
     -------
     None
     """
-    serial.write(bytearray([0xCC, 0x01, 0x81, 0xCC]))
-    SystemMessageCallback(serial)
+    send_command(serial, protocol.POWER_PLUG_DETECT, prnt_msg=True)
 
 
 def GetDeviceInfo(serial) -> None:
@@ -823,8 +842,7 @@ def GetDeviceInfo(serial) -> None:
     -------
     None
     """
-    serial.write(bytearray([0xD1, 0x00, 0xD1]))
-    SystemMessageCallback(serial)
+    send_command(serial, protocol.GET_DEVICE_INFO, prnt_msg=True)
 
 
 def GetFirmwareIDs(serial) -> None:
@@ -840,5 +858,4 @@ def GetFirmwareIDs(serial) -> None:
     -------
     None
     """
-    serial.write(bytearray([0xD2, 0x00, 0xD2]))
-    SystemMessageCallback(serial)
+    send_command(serial, protocol.GET_FIRMWARE_IDS, prnt_msg=True)
@@ -1,11 +1,21 @@
 from pyftdi.ftdi import Ftdi
-import struct
 import time
 from typing import Union
-from sciopy.sciopy_dataclasses import (
+from typing import Iterator
+from .sciopy_dataclasses import (
     ScioSpecMeasurementSetup,
+    FrameBatch,
 )
-import numpy as np
+from .usb_hs_reader import FTDI_LATENCY, UsbHsReader
+from .command_layer import CommandTimeoutError
+from .configurations import (
+    prepare_config_upload,
+    finish_config_upload,
+    verify_acknowledgements,
+)
+from .setup_m import invalidate_device_setup
+from . import protocol
+from .frame_decoding import BurstAssembler
 
 
 def connect_COM_port_usb_hs(
@@ -37,9 +47,15 @@ def connect_COM_port_usb_hs(
     return serial
 
 
-def set_measurement_config_usb_hs(serial: Ftdi, ssms: ScioSpecMeasurementSetup) -> None:
+def set_measurement_config_usb_hs(
+    serial: Ftdi,
+    ssms: ScioSpecMeasurementSetup,
+    verify: bool = False,
+    force: bool = False,
+) -> Union[None, bool]:
     """
     set_measurement_config sets the ScioSpec device configuration depending on the ssms configuration dataclass.
+    All commands are sent with a single bulk transfer. Settings that are unchanged since the last call are skipped.
 
     Parameters
     ----------
@@ -47,125 +63,32 @@ def set_measurement_config_usb_hs(serial: Ftdi, ssms: ScioSpecMeasurementSetup)
         USB-HS serial connection
     ssms : ScioSpecMeasurementSetup
         dataclass with the measurement setup settings.
-    """
-
-    def clTbt_sp(val: Union[int, float]) -> list:
-        """
-        clTbt_sp converts an integer or float value to a list of single precision bytes.
-
-        Parameters
-        ----------
-        val : Union[int, float]
-            Value that has to be converted
-
-        Returns
-        -------
-        list
-            list with single precision byte respresentation
-        """
-        return [int(bt) for bt in struct.pack(">f", val)]
-
-    def clTbt_dp(val: float) -> list:
-        """
-        clTbt_dp converts an integer or float value to a list of double precision bytes.
-
-        Parameters
-        ----------
-        val : float
-            value that has to be converted
-
-        Returns
-        -------
-        list
-            list with double precision byte respresentation
-        """
-        return [int(ele) for ele in struct.pack(">d", val)]
-
-    # Set measurement setup:
-    serial.write_data(bytearray([0xB0, 0x01, 0x01, 0xB0]))
-    # Set burst count: "B0 03 02 00 03 B0" = 3
-    serial.write_data(bytearray([0xB0, 0x03, 0x02, 0x00, ssms.burst_count, 0xB0]))
-
-    # Excitation amplitude double precision
-    # A_min = 100nA
-    # A_max = 10mA
-    if ssms.amplitude > 0.01:
-        print(
-            f"Amplitude {ssms.amplitude}A is out of available range.\nSet amplitude to 10mA."
-        )
-        ssms.amplitude = 0.01
-    serial.write_data(
-        bytearray(list(np.concatenate([[176, 9, 5], clTbt_dp(ssms.amplitude), [176]])))
-    )
-
-    # ADC range settings: [+/-1, +/-5, +/-10]
-    # ADC range = +/-1  : B0 02 0D 01 B0
-    # ADC range = +/-5  : B0 02 0D 02 B0
-    # ADC range = +/-10 : B0 02 0D 03 B0
-    if ssms.adc_range == 1:
-        serial.write_data(bytearray([0xB0, 0x02, 0x0D, 0x01, 0xB0]))
-    elif ssms.adc_range == 5:
-        serial.write_data(bytearray([0xB0, 0x02, 0x0D, 0x02, 0xB0]))
-    elif ssms.adc_range == 10:
-        serial.write_data(bytearray([0xB0, 0x02, 0x0D, 0x03, 0xB0]))
-
-    # Gain settings:
-    # Gain = 1     : B0 03 09 01 00 B0
-    # Gain = 10    : B0 03 09 01 01 B0
-    # Gain = 100   : B0 03 09 01 02 B0
-    # Gain = 1_000 : B0 03 09 01 03 B0
-    if ssms.gain == 1:
-        serial.write_data(bytearray([0xB0, 0x03, 0x09, 0x01, 0x00, 0xB0]))
-    elif ssms.gain == 10:
-        serial.write_data(bytearray([0xB0, 0x03, 0x09, 0x01, 0x01, 0xB0]))
-    elif ssms.gain == 100:
-        serial.write_data(bytearray([0xB0, 0x03, 0x09, 0x01, 0x02, 0xB0]))
-    elif ssms.gain == 1_000:
-        serial.write_data(bytearray([0xB0, 0x03, 0x09, 0x01, 0x03, 0xB0]))
-
-    # Single ended mode:
-    serial.write_data(bytearray([0xB0, 0x03, 0x08, 0x01, 0x01, 0xB0]))
-
-    # Excitation switch type:
-    serial.write_data(bytearray([0xB0, 0x02, 0x0C, 0x01, 0xB0]))
-
-    # Set framerate:
-    serial.write_data(
-        bytearray(list(np.concatenate([[176, 5, 3], clTbt_sp(ssms.framerate), [176]])))
-    )
+    verify : bool, optional
+        read the response and verify all acknowledgements, by default False
+    force : bool, optional
+        resend the full configuration, by default False
 
-    # Set frequencies:
-    # [CT] 0C 04 [fmin] [fmax] [fcount] [ftype] [CT]
-    f_min = clTbt_sp(ssms.exc_freq)
-    f_max = clTbt_sp(ssms.exc_freq)
-    f_count = [0, 1]
-    f_type = [0]
-    # bytearray
-    serial.write_data(
-        bytearray(
-            list(np.concatenate([[176, 12, 4], f_min, f_max, f_count, f_type, [176]]))
+    Returns
+    -------
+    Union[None, bool]
+        None or the verification result if verify is True
+    """
+    buffer, n_commands = prepare_config_upload(serial, ssms, force)
+    if n_commands == 0:
+        return True if verify else None
+    serial.write_data(buffer)
+    accepted = None
+    if verify:
+        received = SystemMessageCallback_usb_hs(
+            serial, prnt_msg=False, ret_hex_int="bytes"
         )
-    )
-
-    # Set injection config
-
-    el_inj = np.arange(1, ssms.n_el + 1)
-    el_gnd = np.roll(el_inj, -(ssms.inj_skip + 1))
-
-    for v_el, g_el in zip(el_inj, el_gnd):
-        serial.write_data(bytearray([0xB0, 0x03, 0x06, v_el, g_el, 0xB0]))
-
-    # Get measurement setup
-    serial.write_data(bytearray([0xB1, 0x01, 0x03, 0xB1]))
-    # Set output configuration
-    serial.write_data(bytearray([0xB2, 0x02, 0x01, 0x01, 0xB2]))
-    serial.write_data(bytearray([0xB2, 0x02, 0x03, 0x01, 0xB2]))
-    serial.write_data(bytearray([0xB2, 0x02, 0x02, 0x01, 0xB2]))
+        accepted = verify_acknowledgements(received, n_commands)
+    return finish_config_upload(serial, ssms, accepted)
 
     ## start measurement
-    # serial.write_data(bytearray([0xB4, 0x01, 0x01, 0xB4]))
+    # serial.write_data(protocol.START_MEASUREMENT)
     # stop measurement
-    # serial.write_data(bytearray([0xB4, 0x01, 0x00, 0xB4]))
+    # serial.write_data(protocol.STOP_MEASUREMENT)
 
 
 def SystemMessageCallback_usb_hs(
@@ -181,11 +104,11 @@ def SystemMessageCallback_usb_hs(
     prnt_msg : bool
         if true print message, if false not
     ret_hex_int : Union[None, str]
-        use ['none','hex', 'int', 'both'] to return nothing, hex or integer data or both.
+        use ['none','hex', 'int', 'both', 'bytes'] to return nothing, hex or integer data, both or the raw bytes.
 
     Returns
     -------
-    [None, received_hex, received, (received, received_hex)]
+    [None, received_hex, received, (received, received_hex), bytes]
         return depens on the ret_hex_int variable
     """
     msg_dict = {
@@ -200,8 +123,7 @@ def SystemMessageCallback_usb_hs(
         "0x92": "Data holdup: Measurement data could not be sent via the master interface",
     }
     timeout_count = 0
-    received = []
-    received_hex = []
+    received = bytearray()
     data_count = 0
 
     while True:
@@ -216,31 +138,33 @@ def SystemMessageCallback_usb_hs(
             # Break if we haven't received any data
             break
 
-        received = "".join(str(received))  # If you need all the data
-    received_hex = [hex(receive) for receive in received]
     try:
-        msg_idx = received_hex.index("0x18")
+        msg_idx = received.index(0x18)
         if prnt_msg:
-            print(msg_dict[received_hex[msg_idx + 2]])
+            print(msg_dict[hex(received[msg_idx + 2])])
     except BaseException:
         if prnt_msg:
             print(msg_dict["0x01"])
         prnt_msg = False
     if prnt_msg:
-        print("message buffer:\n", received_hex)
+        print("message buffer:\n", [hex(receive) for receive in received])
         print("message length:\t", data_count)
 
     if ret_hex_int is None:
         return
+    elif ret_hex_int == "bytes":
+        return bytes(received)
     elif ret_hex_int == "hex":
-        return received_hex
+        return [hex(receive) for receive in received]
     elif ret_hex_int == "int":
-        return received
+        return list(received)
     elif ret_hex_int == "both":
-        return received, received_hex
+        return list(received), [hex(receive) for receive in received]
 
 
-def StartStopMeasurement_usb_hs(serial: Ftdi, print_msg: bool = False) -> list:
+def StartStopMeasurement_usb_hs(
+    serial: Ftdi, print_msg: bool = False, raw: bool = False
+) -> Union[list, bytes]:
     """
     Start and stop the measurement and return the serial message buffer.
 
@@ -250,23 +174,89 @@ def StartStopMeasurement_usb_hs(serial: Ftdi, print_msg: bool = False) -> list:
         USB-HS serial connection
     print_msg : bool
         print the start and stop message, by default False
+    raw : bool
+        return the raw bytes for `decode_bursts()` instead of a list of hex strings, by default False
 
     Returns
     -------
-    list
+    Union[list, bytes]
         message buffer
     """
     if print_msg:
         print("Starting measurement.")
-    serial.write_data(bytearray([0xB4, 0x01, 0x01, 0xB4]))
-    measurement_data_hex = SystemMessageCallback_usb_hs(
-        serial, prnt_msg=False, ret_hex_int="hex"
+    serial.write_data(protocol.START_MEASUREMENT)
+    measurement_data = SystemMessageCallback_usb_hs(
+        serial, prnt_msg=False, ret_hex_int="bytes" if raw else "hex"
     )
     if print_msg:
         print("Stopping measurement.")
-    serial.write_data(bytearray([0xB4, 0x01, 0x00, 0xB4]))
-    SystemMessageCallback_usb_hs(serial, prnt_msg=False, ret_hex_int="int")
-    return measurement_data_hex
+    serial.write_data(protocol.STOP_MEASUREMENT)
+    SystemMessageCallback_usb_hs(serial, prnt_msg=False, ret_hex_int=None)
+    return measurement_data
+
+
+def stream_measurement(
+    serial: Ftdi,
+    ssms: ScioSpecMeasurementSetup,
+    size: int = 1024,
+    attempt: int = 150,
+    reader: Union[None, UsbHsReader] = None,
+    timeout: Union[None, float] = None,
+) -> Iterator[FrameBatch]:
+    """
+    Start a measurement and yield every burst as soon as all its frames are received.
+    The measurement is stopped after `burst_count` bursts or if the generator is closed.
+
+    Parameters
+    ----------
+    serial : Ftdi
+        USB-HS serial connection
+    ssms : ScioSpecMeasurementSetup
+        dataclass with the measurement setup settings
+    size : int, optional
+        bytes per read, by default 1024
+    attempt : int, optional
+        latency timer periods a single read waits for data, by default 150
+    reader : Union[None, UsbHsReader], optional
+        running background reader of the serial connection, by default None
+    timeout : Union[None, float], optional
+        maximum time in seconds without received data, by default two burst
+        periods of `ssms.framerate`, at least the wait of a single read (2.4 s)
+
+    Yields
+    ------
+    Iterator[FrameBatch]
+        single burst frame batch
+
+    Raises
+    ------
+    CommandTimeoutError
+        if no data arrived within the timeout before `burst_count` bursts
+    """
+    if timeout is None:
+        timeout = max(attempt * FTDI_LATENCY, 2.0 / ssms.framerate)
+    bursts = BurstAssembler(ssms)
+    source = serial if reader is None else reader
+    serial.write_data(protocol.START_MEASUREMENT)
+    try:
+        # An empty read is only a gap between bursts, e.g. at a low frame rate.
+        idle_deadline = time.monotonic() + timeout
+        while not bursts.complete:
+            if reader is None:
+                buffer = serial.read_data_bytes(size=size, attempt=attempt)
+            else:
+                remaining = max(0.0, idle_deadline - time.monotonic())
+                buffer = reader.read_data_bytes(size=size, timeout=remaining)
+            if buffer:
+                yield from bursts.feed(buffer)
+                idle_deadline = time.monotonic() + timeout
+            elif time.monotonic() >= idle_deadline:
+                raise CommandTimeoutError(
+                    f"Received {bursts.bursts} of {bursts.burst_count} bursts, no data within {timeout}s"
+                )
+    finally:
+        serial.write_data(protocol.STOP_MEASUREMENT)
+        SystemMessageCallback_usb_hs(source, prnt_msg=False)
 
 
 def SoftwareReset_usb_hs(serial: Ftdi, print_msg: bool = True) -> None:
@@ -280,6 +270,7 @@ def SoftwareReset_usb_hs(serial: Ftdi, print_msg: bool = True) -> None:
     print_msg : bool, optional
         print the callback message, by default True
     """
-    serial.write_data(bytearray([0xA1, 0x00, 0xA1]))
+    invalidate_device_setup(serial)
+    serial.write_data(protocol.SOFTWARE_RESET)
     time.sleep(5)
     SystemMessageCallback_usb_hs(serial, print_msg)
@@ -0,0 +1,180 @@
+import threading
+import time
+from typing import Union
+from pyftdi.ftdi import Ftdi
+
+# Default latency timer of the FTDI chip, `Ftdi.read_data_bytes()` waits up to
+# `attempt` of these periods for data.
+FTDI_LATENCY = 0.016
+
+
+class ByteRingBuffer:
+    """
+    Preallocated single-producer single-consumer byte ring buffer.
+    The producer only advances the write counter and the consumer only advances
+    the read counter, so no lock is required between the two threads.
+
+    Parameters
+    ----------
+    capacity : int
+        size of the buffer in bytes
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self._buffer = bytearray(capacity)
+        self._write = 0  # total number of written bytes
+        self._read = 0  # total number of read bytes
+        self.high_water_mark = 0
+        self.overflow_bytes = 0
+
+    @property
+    def available(self) -> int:
+        """Number of bytes that can be read."""
+        return self._write - self._read
+
+    def write(self, data: Union[bytes, bytearray]) -> int:
+        """
+        Copy data into the ring buffer. Bytes that do not fit are dropped and counted.
+
+        Parameters
+        ----------
+        data : Union[bytes, bytearray]
+            received bytes
+
+        Returns
+        -------
+        int
+            number of written bytes
+        """
+        write = self._write
+        n = min(len(data), self.capacity - (write - self._read))
+        self.overflow_bytes += len(data) - n
+        pos = write % self.capacity
+        first = min(n, self.capacity - pos)
+        self._buffer[pos : pos + first] = data[:first]
+        self._buffer[: n - first] = data[first:n]
+        self._write = write + n
+        self.high_water_mark = max(self.high_water_mark, self._write - self._read)
+        return n
+
+    def read(self, size: int) -> bytes:
+        """
+        Take up to `size` bytes out of the ring buffer.
+
+        Parameters
+        ----------
+        size : int
+            maximum number of bytes
+
+        Returns
+        -------
+        bytes
+            read bytes, empty if nothing is available
+        """
+        read = self._read
+        n = min(size, self._write - read)
+        pos = read % self.capacity
+        first = min(n, self.capacity - pos)
+        data = bytes(self._buffer[pos : pos + first]) + bytes(self._buffer[: n - first])
+        self._read = read + n
+        return data
+
+
+class UsbHsReader(threading.Thread):
+    """
+    Background thread that continuously drains the FTDI device into a ByteRingBuffer.
+    The reader offers `read_data_bytes()` like `Ftdi`, so it can replace the serial
+    connection wherever measurement data is read, e.g. in `stream_measurement()`.
+    Commands are still written to the serial connection itself.
+
+    Parameters
+    ----------
+    serial : Ftdi
+        USB-HS serial connection
+    capacity : int, optional
+        ring buffer size in bytes, by default 64 MiB
+    chunk_size : int, optional
+        bytes per device read, by default 65536
+    idle_sleep : float, optional
+        pause in seconds after an empty device read, by default 0.0005
+    """
+
+    def __init__(
+        self,
+        serial: Ftdi,
+        capacity: int = 64 * 1024 * 1024,
+        chunk_size: int = 65536,
+        idle_sleep: float = 0.0005,
+    ) -> None:
+        super().__init__(daemon=True)
+        self.serial = serial
+        self.ring = ByteRingBuffer(capacity)
+        self.chunk_size = chunk_size
+        self.idle_sleep = idle_sleep
+        self.bytes_received = 0
+        self.device_reads = 0
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.is_set():
+            data = self.serial.read_data_bytes(size=self.chunk_size, attempt=1)
+            self.device_reads += 1
+            if data:
+                self.bytes_received += len(data)
+                self.ring.write(data)
+            else:
+                time.sleep(self.idle_sleep)
+
+    def stop(self) -> None:
+        """
+        Stop the thread and wait until the last device read is finished.
+        """
+        self._stop_event.set()
+        self.join()
+
+    def read_data_bytes(
+        self, size: int = 1024, attempt: int = 150, timeout: Union[None, float] = None
+    ) -> bytes:
+        """
+        Read buffered bytes, compatible to `Ftdi.read_data_bytes()`.
+
+        Parameters
+        ----------
+        size : int, optional
+            maximum number of bytes, by default 1024
+        attempt : int, optional
+            latency timer periods to wait for data like `Ftdi`, by default 150 (2.4 s)
+        timeout : Union[None, float], optional
+            maximum time in seconds to wait while the buffer is empty, overrides
+            `attempt`, by default None
+
+        Returns
+        -------
+        bytes
+            read bytes, empty if nothing arrived
+        """
+        if timeout is None:
+            timeout = attempt * FTDI_LATENCY
+        deadline = time.monotonic() + timeout
+        while not self.ring.available and time.monotonic() < deadline:
+            time.sleep(self.idle_sleep)
+        return self.ring.read(size)
+
+    def statistics(self) -> dict:
+        """
+        Statistics of the reader and the ring buffer.
+
+        Returns
+        -------
+        dict
+            received bytes, device reads, buffered bytes, high water mark and dropped bytes
+        """
+        return {
+            "capacity": self.ring.capacity,
+            "bytes_received": self.bytes_received,
+            "device_reads": self.device_reads,
+            "buffered": self.ring.available,
+            "high_water_mark": self.ring.high_water_mark,
+            "overflow_bytes": self.ring.overflow_bytes,
+        }
@@ -1,10 +1,8 @@
 import matplotlib.pyplot as plt
 import numpy as np
-import math
-import os
 from typing import Tuple
-from .prepare_data import comp_tank_relative_r_phi
-from sciopy.prepare_data import norm_data
+from .prepare_data import norm_data
+from .sample_index import load_index
 
 
 def plot_potential_matrix(sample: np.lib.npyio.NpzFile) -> None:
@@ -124,25 +122,17 @@ def plot_completeness(lpath: str) -> None:
     lpath : str
         target load directory
     """
-    r = []
-    phi = []
-
-    r_empty = []
-    phi_empty = []
-
-    decide_mode_sample = np.load(lpath + os.listdir(lpath)[0], allow_pickle=True)
-    if decide_mode_sample.files[0] == "config":
-        for ele in np.sort(os.listdir(lpath))[
-            :: decide_mode_sample["config"].tolist().burst_count
-        ]:
-            tmp = np.load(lpath + ele, allow_pickle=True)
-            r_c, phi_c = comp_tank_relative_r_phi(tmp)
-            if len(tmp["data"]) == 0:
-                r_empty.append(r_c)
-                phi_empty.append(math.radians(phi_c))
-            else:
-                r.append(r_c)
-                phi.append(math.radians(phi_c))
+    index = load_index(lpath)
+    points = index.iloc[:: int(index["burst_count"].iloc[0])]
+    r = points["r"].to_numpy()
+    phi = np.radians(points["phi"].to_numpy())
+
+    if index["kind"].iloc[0] == "raw":
+        empty = (points["n_frames"] == 0).to_numpy()
+        r_empty = r[empty]
+        phi_empty = phi[empty]
+        r = r[~empty]
+        phi = phi[~empty]
 
         fig = plt.figure(figsize=(8, 8))
         ax = fig.add_subplot(projection="polar", polar=True)
@@ -160,15 +150,7 @@ def plot_completeness(lpath: str) -> None:
         ax.legend()
         plt.tight_layout()
         print(f"\tMissing points:{len(phi_empty)}")
-
-    if decide_mode_sample.files[0] == "potential_matrix":
-        for ele in np.sort(os.listdir(lpath))[
-            :: decide_mode_sample["config"].tolist()["burst_count"]
-        ]:
-            tmp = np.load(lpath + ele, allow_pickle=True)
-            r.append(tmp["r_phi"][0])
-            phi.append(math.radians(tmp["r_phi"][1]))
-
+    else:
         fig = plt.figure(figsize=(8, 8))
         ax = fig.add_subplot(projection="polar", polar=True)
         ax.scatter(phi, r, c="green", s=20, alpha=1, label="existing points")
@@ -192,20 +174,14 @@ def plot_temperatur_curve(
         temperatures, mean(t), std(t), max(t)-min(t)
     """
 
-    temperature = []
-    date = []
-    time = []
-    decide_skip = np.load(lpath + os.listdir(lpath)[0], allow_pickle=True)
-
-    if decide_skip.files[0] == "config":
-        for ele in np.sort(os.listdir(lpath))[
-            :: decide_skip["config"].tolist().burst_count
-        ]:
-            tmp = np.load(lpath + ele, allow_pickle=True)
-            temperature.append(tmp["config"].tolist().temperature)
-            date.append(tmp["config"].tolist().datetime.split(" ")[0])
-            time.append(tmp["config"].tolist().datetime.split(" ")[1][:-3])
+    index = load_index(lpath)
+    if index["kind"].iloc[0] == "raw":
+        points = index.iloc[:: int(index["burst_count"].iloc[0])]
+        temperature = points["temperature"].tolist()
+        date = [dt.split(" ")[0] for dt in points["datetime"]]
+        time = [dt.split(" ")[1][:-3] for dt in points["datetime"]]
     else:
+        temperature, date, time = [], [], []
         print("Please insert the lpath of the original measurement directory.")
 
     date = np.array(date)
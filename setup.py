@@ -16,4 +16,5 @@ setuptools.setup(
         "Operating System :: OS Independent",
     ],
     url="https://github.com/spatialaudio/sciopy.git",
+    extras_require={"parquet": ["pyarrow>=7.0"]},
 )